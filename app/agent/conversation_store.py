@@ -1,70 +1,133 @@
-"""Helpers for persisting per-session conversation state in Redis."""
+"""Helpers for persisting per-session conversation state in Redis.
+
+Each session is stored as a single RedisJSON document::
+
+    chat:{session_id} -> {"history": [...], "last_intent": "SQL", "updated_at": "..."}
+
+History appends and trims run server-side (``JSON.ARRAPPEND`` /
+``JSON.ARRTRIM``) inside one pipeline, so a conversation turn costs a single
+round-trip with no client-side re-serialisation of the whole history.
+Requires the RedisJSON module (bundled with Redis Stack).
+"""
 
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from app.core.cache import append_json_list, get_json, get_json_list, set_json
+from app.core.cache import get_client
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
 
 CHAT_TTL_SECONDS = 60 * 60 * 6  # 6 hours
 MAX_TURNS_STORED = 40
 
+_UTC = timezone.utc
+
+
+def _now_iso() -> str:
+    """Informational turn timestamp; second precision keeps isoformat cheap."""
+    return datetime.now(_UTC).isoformat(timespec="seconds")
+
+
+_EMPTY_SESSION: Dict[str, Any] = {"history": []}
+
 
-def _history_key(session_id: str) -> str:
-    return f"chat:{session_id}:history"
+def _session_key(session_id: str) -> str:
+    return f"chat:{session_id}"
 
 
-def _meta_key(session_id: str) -> str:
-    return f"chat:{session_id}:meta"
+def _append_turn(session_id: str, turn: Dict[str, Any]) -> Dict[str, Any]:
+    client = get_client()
+    if not client:
+        return turn
+    key = _session_key(session_id)
+    try:
+        with client.pipeline(transaction=True) as pipe:
+            pipe.json().set(key, "$", _EMPTY_SESSION, nx=True)
+            pipe.json().arrappend(key, "$.history", turn)
+            pipe.json().arrtrim(key, "$.history", -MAX_TURNS_STORED, -1)
+            pipe.expire(key, CHAT_TTL_SECONDS)
+            pipe.execute()
+    except Exception as exc:  # pragma: no cover - degraded cache is non-fatal
+        logger.warning("Redis JSON append failed for session %s: %s", session_id, exc)
+    return turn
 
 
-def append_user_turn(session_id: str, prompt: str) -> None:
+def append_user_turn(session_id: str, prompt: str) -> Dict[str, Any]:
+    """Append a user turn and return it exactly as stored."""
     turn = {
         "role": "user",
         "prompt": prompt,
-        "timestamp": datetime.now(tz=timezone.utc).isoformat(),
+        "timestamp": _now_iso(),
     }
-    append_json_list(
-        _history_key(session_id),
-        turn,
-        ttl=CHAT_TTL_SECONDS,
-        max_items=MAX_TURNS_STORED,
-    )
+    return _append_turn(session_id, turn)
 
 
-def append_agent_turn(session_id: str, turn: Dict[str, Any]) -> None:
+def append_agent_turn(session_id: str, turn: Dict[str, Any]) -> Dict[str, Any]:
+    """Append an agent turn and return it exactly as stored."""
     payload = {
         **turn,
         "role": "agent",
-        "timestamp": datetime.now(tz=timezone.utc).isoformat(),
+        "timestamp": _now_iso(),
     }
-    append_json_list(
-        _history_key(session_id),
-        payload,
-        ttl=CHAT_TTL_SECONDS,
-        max_items=MAX_TURNS_STORED,
-    )
+    return _append_turn(session_id, payload)
+
+
+def _get_document(session_id: str) -> Optional[Dict[str, Any]]:
+    client = get_client()
+    if not client:
+        return None
+    try:
+        payload = client.json().get(_session_key(session_id), "$")
+    except Exception as exc:  # pragma: no cover - degraded cache is non-fatal
+        logger.warning("Redis JSON get failed for session %s: %s", session_id, exc)
+        return None
+    if isinstance(payload, list) and payload and isinstance(payload[0], dict):
+        return payload[0]
+    if isinstance(payload, dict):
+        return payload
+    return None
 
 
 def get_history(session_id: str) -> List[Dict[str, Any]]:
-    return get_json_list(_history_key(session_id))
+    document = _get_document(session_id)
+    history = document.get("history") if document else None
+    return history if isinstance(history, list) else []
 
 
 def get_last_intent(session_id: str) -> Optional[str]:
-    meta = get_json(_meta_key(session_id))
-    if isinstance(meta, dict):
-        intent = meta.get("last_intent")
+    document = _get_document(session_id)
+    return _extract_last_intent(document)
+
+
+def get_history_and_intent(session_id: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Fetch conversation history and last intent in a single Redis round-trip."""
+    document = _get_document(session_id)
+    history = document.get("history") if document else None
+    return (history if isinstance(history, list) else []), _extract_last_intent(document)
+
+
+def _extract_last_intent(document: Optional[Dict[str, Any]]) -> Optional[str]:
+    if isinstance(document, dict):
+        intent = document.get("last_intent")
         if isinstance(intent, str):
             return intent
     return None
 
 
 def set_last_intent(session_id: str, intent: str) -> None:
-    payload = {
-        "last_intent": intent,
-        "updated_at": datetime.now(tz=timezone.utc).isoformat(),
-    }
-    set_json(_meta_key(session_id), payload, ttl=CHAT_TTL_SECONDS)
-
-
+    client = get_client()
+    if not client:
+        return
+    key = _session_key(session_id)
+    try:
+        with client.pipeline(transaction=True) as pipe:
+            pipe.json().set(key, "$", _EMPTY_SESSION, nx=True)
+            pipe.json().set(key, "$.last_intent", intent)
+            pipe.json().set(key, "$.updated_at", _now_iso())
+            pipe.expire(key, CHAT_TTL_SECONDS)
+            pipe.execute()
+    except Exception as exc:  # pragma: no cover - degraded cache is non-fatal
+        logger.warning("Redis JSON set failed for session %s: %s", session_id, exc)
@@ -4,18 +4,35 @@ from __future__ import annotations
 
 import logging
 import re
-from dataclasses import dataclass
-from typing import Iterable, Set, List
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Set, List
 
 from sqlglot import exp, parse_one
 
 logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=512)
+def _parse_sql_cached(query: str) -> exp.Expression | None:
+    """Parse SQL once and cache the tree; returns None for unparsable input."""
+    try:
+        return parse_one(query, read="postgres")
+    except Exception as exc:  # pragma: no cover - parser failures bubble up
+        logger.warning("Skipping AST validation for unparsable SQL: %s", exc)
+        return None
+
 _READ_ONLY_PATTERN = re.compile(r"^\s*(select|with)\b", re.IGNORECASE | re.DOTALL)
 _PROHIBITED_KEYWORDS = re.compile(
     r"\b(insert|update|delete|drop|alter|create|grant|revoke|truncate|comment|merge|call|exec)\b",
     re.IGNORECASE,
 )
+# Fused scan: prohibited keywords (group 1) and embedded statement separators
+# (a ';' not merely trailing) detected in one pass over the query body.
+_READ_ONLY_VIOLATION_RE = re.compile(
+    r"\b(insert|update|delete|drop|alter|create|grant|revoke|truncate|comment|merge|call|exec)\b"
+    r"|;(?![\s;]*$)",
+    re.IGNORECASE,
+)
 
 _TABLE_COLUMN_MAP: dict[str, set[str]] = {
     "patients": {
@@ -83,8 +100,12 @@ _TABLE_COLUMN_MAP: dict[str, set[str]] = {
         "units",
     },
 }
-_ALLOWED_COLUMN_NAMES: Set[str] = {col for cols in _TABLE_COLUMN_MAP.values() for col in cols}
-_ALLOWED_TABLE_NAMES: Set[str] = set(_TABLE_COLUMN_MAP.keys())
+_ALLOWED_COLUMN_NAMES: frozenset[str] = frozenset(
+    col for cols in _TABLE_COLUMN_MAP.values() for col in cols
+)
+_ALLOWED_TABLE_NAMES: frozenset[str] = frozenset(_TABLE_COLUMN_MAP.keys())
+_ALLOWED_COLUMNS_DISPLAY = ", ".join(sorted(_ALLOWED_COLUMN_NAMES))
+_ALLOWED_TABLES_DISPLAY = ", ".join(sorted(_ALLOWED_TABLE_NAMES))
 
 _PROMPT_PROHIBITED_KEYWORDS = {
     "drop",
@@ -97,14 +118,18 @@ _PROMPT_PROHIBITED_KEYWORDS = {
     "grant",
     "revoke",
 }
+_PROMPT_PROHIBITED_RE = re.compile(
+    r"\b(?:" + "|".join(map(re.escape, sorted(_PROMPT_PROHIBITED_KEYWORDS))) + r")\b",
+    re.IGNORECASE,
+)
+_PROMPT_TABLE_RE = re.compile(r"\b(?:from|join|table)\s+\"?([A-Za-z_][\w.]*)\"?", re.IGNORECASE)
 
 
 class GuardrailViolation(Exception):
     """Raised when generated SQL violates safety policies."""
 
 
-@dataclass
-class SqlValidationResult:
+class SqlValidationResult(NamedTuple):
     query: str
     enforced_limit: bool
 
@@ -113,50 +138,66 @@ def ensure_read_only(query: str) -> None:
     """Ensure the SQL query is read-only."""
     if not _READ_ONLY_PATTERN.match(query):
         raise GuardrailViolation("Only SELECT/CTE queries are permitted.")
-    if _PROHIBITED_KEYWORDS.search(query):
-        raise GuardrailViolation("Detected prohibited SQL keywords (DML/DDL).")
-    if ";" in query.strip().rstrip(";"):
+    match = _READ_ONLY_VIOLATION_RE.search(query)
+    if match:
+        if match.group(1):
+            raise GuardrailViolation("Detected prohibited SQL keywords (DML/DDL).")
         raise GuardrailViolation("Multiple SQL statements are not allowed.")
 
 
 def ensure_known_columns(query: str) -> None:
     """Ensure generated SQL does not reference unknown column names."""
-    try:
-        tree = parse_one(query, read="postgres")
-    except Exception as exc:  # pragma: no cover - parser failures bubble up
-        logger.warning("Skipping column validation for unparsable SQL: %s", exc)
-        return
-
-    for column in tree.find_all(exp.Column):
-        select_ancestor = column.find_ancestor(exp.Select)
-        alias_names = _collect_aliases(select_ancestor) if select_ancestor else set()
-        _validate_column_reference(column, alias_names)
+    _validate_tables_and_columns(query)
 
 
 def ensure_known_tables(query: str) -> None:
     """Ensure the query references only documented base tables."""
-    try:
-        tree = parse_one(query, read="postgres")
-    except Exception as exc:  # pragma: no cover - parser failures bubble up
-        logger.warning("Skipping table validation for unparsable SQL: %s", exc)
+    _validate_tables_and_columns(query)
+
+
+def _validate_tables_and_columns(query: str) -> None:
+    """Validate table and column references in a single AST traversal.
+
+    Collecting both node kinds in one ``tree.walk()`` halves the AST visits
+    compared to running ``find_all`` per expression type. Table violations are
+    reported before column violations to keep error precedence stable.
+    """
+    tree = _parse_sql_cached(query)
+    if tree is None:
         return
 
-    unknown: List[str] = []
-    for table in tree.find_all(exp.Table):
-        name = getattr(table, "name", None)
-        if not name:
-            continue
-        normalized = str(name).strip('"').lower()
-        # schema-qualified names like healthcare_demo.patients -> 'patients'
-        if "." in normalized:
-            normalized = normalized.split(".")[-1]
-        if normalized not in _ALLOWED_TABLE_NAMES:
-            unknown.append(str(name))
-    if unknown:
+    unknown_tables: List[str] = []
+    column_violation: GuardrailViolation | None = None
+    # Explicit DFS carrying the nearest enclosing Select's alias set, so the
+    # per-column find_ancestor walk (O(columns * depth)) disappears and each
+    # Select's aliases are collected exactly once.
+    pending: List[tuple[exp.Expression, Set[str]]] = [(tree, set())]
+    while pending:
+        node, alias_names = pending.pop()
+        if isinstance(node, exp.Select):
+            alias_names = _collect_aliases(node)
+        elif isinstance(node, exp.Table):
+            name = getattr(node, "name", None)
+            if name:
+                normalized = str(name).strip('"').lower()
+                # schema-qualified names like healthcare_demo.patients -> 'patients'
+                if "." in normalized:
+                    normalized = normalized.split(".")[-1]
+                if normalized not in _ALLOWED_TABLE_NAMES:
+                    unknown_tables.append(str(name))
+        elif isinstance(node, exp.Column) and column_violation is None:
+            try:
+                _validate_column_reference(node, alias_names)
+            except GuardrailViolation as violation:
+                column_violation = violation
+        pending.extend((child, alias_names) for child in node.iter_expressions())
+    if unknown_tables:
         raise GuardrailViolation(
-            f"Unknown table(s): {', '.join(sorted(unknown))}. "
-            f"Use only documented tables: {', '.join(sorted(_ALLOWED_TABLE_NAMES))}."
+            f"Unknown table(s): {', '.join(sorted(unknown_tables))}. "
+            f"Use only documented tables: {_ALLOWED_TABLES_DISPLAY}."
         )
+    if column_violation is not None:
+        raise column_violation
 
 
 def _collect_aliases(select: exp.Select | None) -> Set[str]:
@@ -188,13 +229,28 @@ def _validate_column_reference(column: exp.Column, alias_names: Set[str]) -> Non
 
     if normalized not in _ALLOWED_COLUMN_NAMES:
         raise GuardrailViolation(
-            f"Unknown column '{normalized}'. Valid columns include: {sorted(_ALLOWED_COLUMN_NAMES)}"
+            f"Unknown column '{normalized}'. Valid columns include: {_ALLOWED_COLUMNS_DISPLAY}"
         )
 
 
+_LIMIT_RE = re.compile(r"\blimit\b", re.IGNORECASE)
+
+
+def _has_limit(query: str) -> bool:
+    """Check for a top-level LIMIT using the cached AST when available.
+
+    The AST check ignores ``limit`` inside string literals or subqueries;
+    the regex is only a fallback for unparsable SQL.
+    """
+    tree = _parse_sql_cached(query)
+    if tree is not None:
+        return bool(tree.args.get("limit"))
+    return bool(_LIMIT_RE.search(query))
+
+
 def enforce_limit(query: str, limit: int) -> SqlValidationResult:
     """Ensure the query includes a LIMIT clause, appending if required."""
-    if re.search(r"\blimit\b", query, re.IGNORECASE):
+    if _has_limit(query):
         return SqlValidationResult(query=query, enforced_limit=False)
     sanitized = query.rstrip().rstrip(";")
     enforced = f"{sanitized}\nLIMIT {limit}"
@@ -204,15 +260,13 @@ def enforce_limit(query: str, limit: int) -> SqlValidationResult:
 def validate_sql(query: str, *, limit: int) -> SqlValidationResult:
     """Validate and normalise SQL query for execution."""
     ensure_read_only(query)
-    ensure_known_tables(query)
-    ensure_known_columns(query)
+    _validate_tables_and_columns(query)
     return enforce_limit(query, limit)
 
 
 def ensure_safe_prompt(prompt: str) -> None:
     """Basic prompt-level guardrail to stop direct DDL/DML instructions."""
-    lowered = prompt.lower()
-    if any(keyword in lowered for keyword in _PROMPT_PROHIBITED_KEYWORDS):
+    if _PROMPT_PROHIBITED_RE.search(prompt):
         raise GuardrailViolation(
             "Detected potentially destructive instruction in the prompt. "
             "Only read-only analytics requests are permitted."
@@ -228,31 +282,19 @@ def ensure_prompt_tables_known(prompt: str) -> None:
     """Best-effort scan of the prompt for table names like 'from <name>' or 'join <name>'.
     If any are not in the allowed table set, raise a violation early with a helpful message.
     """
-    lowered = prompt.lower()
     candidates: Set[str] = set()
-    # naive extraction after keywords
-    for kw in (" from ", " join ", " table "):
-        idx = 0
-        while True:
-            idx = lowered.find(kw, idx)
-            if idx == -1:
-                break
-            start = idx + len(kw)
-            end = start
-            while end < len(lowered) and (lowered[end].isalnum() or lowered[end] in {"_", ".", '"'}):
-                end += 1
-            token = lowered[start:end].strip().strip('"')
-            if token:
-                # schema-qualified -> take last part
-                if "." in token:
-                    token = token.split(".")[-1]
-                candidates.add(token)
-            idx = end
+    for match in _PROMPT_TABLE_RE.finditer(prompt):
+        token = match.group(1).lower().strip('"')
+        if token:
+            # schema-qualified -> take last part
+            if "." in token:
+                token = token.split(".")[-1]
+            candidates.add(token)
     unknown = [t for t in candidates if t and t not in _ALLOWED_TABLE_NAMES]
     if unknown:
         raise GuardrailViolation(
             f"Detected unknown table name(s) in the request: {', '.join(sorted(unknown))}. "
-            f"Valid tables: {', '.join(sorted(_ALLOWED_TABLE_NAMES))}."
+            f"Valid tables: {_ALLOWED_TABLES_DISPLAY}."
         )
 
 
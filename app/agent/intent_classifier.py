@@ -5,10 +5,53 @@ from __future__ import annotations
 from typing import Dict, List, Optional, Tuple
 
 from app.agent.llm import LambdaLLMClient, LLMError
-from app.agent.planner import Intent
+from app.agent.planner import CHART_KEYWORDS, ETL_KEYWORDS, Intent, SQL_KEYWORDS, _tokenize
 
 INTENT_CHOICES = {"SQL", "ETL", "FOLLOWUP"}
 
+_SUMMARY_PREVIEW_LEN = 400
+
+_CLASSIFIER_PROMPT = (
+    "You are an intent classifier for a data analytics assistant. "
+    "Given the recent conversation, decide whether the user's next request "
+    "requires running a SQL query, executing an ETL pipeline, or simply follows up "
+    "on the previous response without changing the intent.\n\n"
+    "Output exactly one token from the set: SQL, ETL, FOLLOWUP.\n\n"
+    "Conversation history:\n{context}\n\n"
+    "User request: {prompt}\n\n"
+    "Answer:"
+)
+
+
+def _keyword_fast_path(prompt: str) -> Optional[Intent]:
+    """Classify unambiguous prompts from keywords alone, skipping the LLM.
+
+    Only a clean SQL-xor-ETL keyword hit short-circuits; chart-flavoured or
+    ambiguous prompts still go through the LLM so routing behaviour there is
+    unchanged.
+    """
+    tokens = _tokenize(prompt)
+    if tokens & CHART_KEYWORDS:
+        return None
+    etl_hit = bool(tokens & ETL_KEYWORDS)
+    sql_hit = bool(tokens & SQL_KEYWORDS)
+    if etl_hit ^ sql_hit:
+        return Intent.ETL if etl_hit else Intent.SQL
+    return None
+
+
+def _format_turn(turn: Dict[str, str]) -> str:
+    """Render one history turn for the classifier context window."""
+    role = turn.get("role")
+    if role == "user":
+        return f"User: {turn.get('prompt', '')}"
+    if role == "agent":
+        summary = turn.get("summary") or turn.get("sql") or ""
+        if len(summary) > _SUMMARY_PREVIEW_LEN:
+            summary = summary[:_SUMMARY_PREVIEW_LEN] + " ..."
+        return f"Agent ({turn.get('intent', '')}): {summary}"
+    return ""
+
 
 class IntentClassifier:
     """Uses a lightweight LLM call to classify the user's intent."""
@@ -23,38 +66,46 @@ class IntentClassifier:
     ) -> Tuple[Optional[Intent], bool]:
         """Return (intent, reuse_last_flag)."""
 
-        history_lines = []
-        for turn in history[-4:]:
-            role = turn.get("role")
-            if role == "user":
-                history_lines.append(f"User: {turn.get('prompt', '')}")
-            elif role == "agent":
-                intent = turn.get("intent", "")
-                summary = turn.get("summary") or turn.get("sql") or ""
-                if summary and len(summary) > 400:
-                    summary = summary[:400] + " ..."
-                history_lines.append(f"Agent ({intent}): {summary}")
-
-        context_block = "\n".join(history_lines)
-        instruction = (
-            "You are an intent classifier for a data analytics assistant. "
-            "Given the recent conversation, decide whether the user's next request "
-            "requires running a SQL query, executing an ETL pipeline, or simply follows up "
-            "on the previous response without changing the intent.\n\n"
-            "Output exactly one token from the set: SQL, ETL, FOLLOWUP."
-        )
-        prompt_block = (
-            f"{instruction}\n\n"
-            f"Conversation history:\n{context_block or '(none)'}\n\n"
-            f"User request: {prompt}\n\n"
-            "Answer:"
-        )
+        fast_intent = _keyword_fast_path(prompt)
+        if fast_intent is not None:
+            return fast_intent, False
+
+        prompt_block = self._build_prompt(prompt, history)
 
         try:
             label = self._llm.generate(prompt_block).strip().upper()
         except LLMError:
             return None, False
 
+        return self._interpret_label(label)
+
+    @staticmethod
+    def _build_prompt(prompt: str, history: List[Dict[str, str]]) -> str:
+        context_block = "\n".join(
+            line for line in (_format_turn(turn) for turn in history[-4:]) if line
+        )
+        return _CLASSIFIER_PROMPT.format(context=context_block or "(none)", prompt=prompt)
+
+    async def aclassify(
+        self,
+        prompt: str,
+        history: List[Dict[str, str]],
+    ) -> Tuple[Optional[Intent], bool]:
+        """Async variant of :meth:`classify` so callers can overlap LLM calls."""
+        fast_intent = _keyword_fast_path(prompt)
+        if fast_intent is not None:
+            return fast_intent, False
+
+        prompt_block = self._build_prompt(prompt, history)
+        try:
+            label = (await self._llm.agenerate(prompt_block)).strip().upper()
+        except LLMError:
+            return None, False
+
+        return self._interpret_label(label)
+
+    @staticmethod
+    def _interpret_label(label: str) -> Tuple[Optional[Intent], bool]:
         if label not in INTENT_CHOICES:
             return None, False
 
@@ -2,16 +2,113 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import re
+import threading
+import weakref
+from functools import lru_cache
 
 import httpx
+import orjson
 
 from app.core.config import get_settings
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+_CODE_FENCE_RE = re.compile(r"^```(?:\w+)?\s*(.*?)\s*```$", re.DOTALL)
+
+# Priority-ordered keys that may carry the generated text in proxy envelopes.
+_CONTENT_KEYS = ("reply", "sql", "content", "response")
+
+# Fast path for flat `{"reply": "..."}` / `{"sql": "..."}` envelopes: extract
+# the string without materializing the whole payload dict.
+_FAST_CONTENT_RE = re.compile(rb'"(?:reply|sql)"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def _parse_payload(content: bytes) -> str:
+    """Decode a proxy response body and extract the generated text."""
+    if b'"reply"' in content[:64] or b'"sql"' in content[:64]:
+        match = _FAST_CONTENT_RE.search(content)
+        if match:
+            return _strip_code_fence(orjson.loads(b'"' + match.group(1) + b'"'))
+    try:
+        payload = orjson.loads(content)
+    except orjson.JSONDecodeError as exc:
+        raise LLMError("LLM proxy returned invalid JSON.") from exc
+    return _extract_content(payload)
+
+_SHARED_CLIENT: httpx.Client | None = None
+
+
+def _get_client(timeout: float) -> httpx.Client:
+    """Return the process-wide HTTP client, creating it on first use.
+
+    Sharing one keep-alive client across all ``LambdaLLMClient`` instances
+    avoids a fresh TCP/TLS handshake per instantiation site.
+    """
+    global _SHARED_CLIENT
+    if _SHARED_CLIENT is None:
+        _SHARED_CLIENT = httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=300),
+        )
+    return _SHARED_CLIENT
+
+
+# Async clients keyed by the event loop they were created under: an
+# httpx.AsyncClient's pool is loop-bound, and the server loop (aclassify)
+# runs concurrently with worker threads whose sync shims spin up their own
+# loops (generate_many), so a single rebuilt global would be clobbered from
+# both sides — abandoning keep-alive pools unclosed and handing one caller
+# a client whose connections belong to another loop. The lock covers the
+# check-then-set; loop-owning callers close their entry before loop teardown.
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_ASYNC_CLIENTS_LOCK = threading.Lock()
+
+
+def _get_async_client(timeout: float) -> httpx.AsyncClient:
+    """Return the calling loop's async HTTP client, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    with _ASYNC_CLIENTS_LOCK:
+        client = _ASYNC_CLIENTS.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                timeout=timeout,
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=300),
+            )
+            _ASYNC_CLIENTS[loop] = client
+    return client
+
+
+async def _close_running_loop_client() -> None:
+    """Close and drop the current loop's client, releasing its sockets."""
+    loop = asyncio.get_running_loop()
+    with _ASYNC_CLIENTS_LOCK:
+        client = _ASYNC_CLIENTS.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+# Cap on in-flight proxy calls per event loop so speculative fan-out cannot
+# stampede the Lambda proxy.
+_MAX_CONCURRENT_LLM = 4
+_LLM_SEMAPHORES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _llm_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _LLM_SEMAPHORES.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_LLM)
+        _LLM_SEMAPHORES[loop] = semaphore
+    return semaphore
+
 
 class LLMError(RuntimeError):
     """Raised when the language model interaction fails."""
@@ -19,8 +116,7 @@ class LLMError(RuntimeError):
 
 def _strip_code_fence(text: str) -> str:
     """Remove common Markdown code fences from LLM responses."""
-    pattern = re.compile(r"^```(?:\w+)?\s*(.*?)\s*```$", re.DOTALL)
-    match = pattern.match(text.strip())
+    match = _CODE_FENCE_RE.match(text.strip())
     if match:
         return match.group(1).strip()
     return text
@@ -41,21 +137,10 @@ def _extract_content(payload: object) -> str:
         elif isinstance(body, dict):
             payload = body
 
-        reply = payload.get("reply")
-        if isinstance(reply, str):
-            return _strip_code_fence(reply)
-
-        sql = payload.get("sql")
-        if isinstance(sql, str):
-            return _strip_code_fence(sql)
-
-        content = payload.get("content")
-        if isinstance(content, str):
-            return _strip_code_fence(content)
-
-        response = payload.get("response")
-        if isinstance(response, str):
-            return _strip_code_fence(response)
+        for key in _CONTENT_KEYS:
+            value = payload.get(key)
+            if isinstance(value, str):
+                return _strip_code_fence(value)
 
         choices = payload.get("choices")
         if choices:
@@ -72,6 +157,37 @@ def _extract_content(payload: object) -> str:
     raise LLMError(f"Unexpected response format from LLM proxy: {payload!r}")
 
 
+def _generate_once(url: str, timeout: float, prompt: str) -> str:
+    """Post a prompt to the proxy and extract the generated text."""
+    try:
+        response = _get_client(timeout).post(
+            url,
+            json={"prompt": prompt},
+            headers={"Content-Type": "application/json"},
+        )
+        response.raise_for_status()
+    except httpx.TimeoutException as exc:
+        raise LLMError(f"LLM proxy request timed out after {timeout} seconds") from exc
+    except httpx.HTTPError as exc:  # pragma: no cover - passthrough network errors
+        raise LLMError(f"LLM proxy request failed: {exc}") from exc
+
+    content = _parse_payload(response.content).strip()
+    logger.debug("LLM proxy response: %s", content)
+    return content
+
+
+@lru_cache(maxsize=1024)
+def _cached_generate(url: str, timeout: float, prompt: str) -> str:
+    """Memoized generation for deterministic proxy settings.
+
+    Only used when ``settings.llm_cache_enabled`` is on; repeat prompts
+    (UI retries, clustered classifier prompts) then skip the network
+    round-trip entirely. Failures are not cached — ``lru_cache`` does not
+    memoize raised exceptions.
+    """
+    return _generate_once(url, timeout, prompt)
+
+
 class LambdaLLMClient:
     """Thin wrapper around the Lambda HTTP endpoint that fronts the OpenAI call."""
 
@@ -79,37 +195,73 @@ class LambdaLLMClient:
         settings = get_settings()
         self._url = settings.llm_proxy_url
         self._timeout = settings.llm_timeout_seconds
-        self._client = httpx.Client(timeout=self._timeout)
+        self._cache_enabled = getattr(settings, "llm_cache_enabled", False)
+
+    def warmup(self) -> None:
+        """Open the keep-alive connection ahead of the first real request.
+
+        Any response — an error status included — completes the TCP/TLS
+        handshake, which is all this is for.
+        """
+        try:
+            _get_client(self._timeout).head(self._url, timeout=5.0)
+        except httpx.HTTPError:
+            logger.debug("LLM proxy warm-up ping failed", exc_info=True)
 
     def generate(self, prompt: str) -> str:
         """Send prompt to the proxy and return generated SQL."""
+        if self._cache_enabled:
+            return _cached_generate(self._url, self._timeout, prompt)
+        return _generate_once(self._url, self._timeout, prompt)
+
+    async def agenerate(self, prompt: str) -> str:
+        """Async variant of :meth:`generate` for callers that overlap LLM calls.
+
+        Independent prompts can be awaited with ``asyncio.gather`` so total
+        latency approaches ``max(t_i)`` instead of ``sum(t_i)``.
+        """
         try:
-            response = self._client.post(
-                self._url,
-                json={"prompt": prompt},
-                headers={"Content-Type": "application/json"},
-            )
+            async with _llm_semaphore():
+                response = await _get_async_client(self._timeout).post(
+                    self._url,
+                    json={"prompt": prompt},
+                    headers={"Content-Type": "application/json"},
+                )
             response.raise_for_status()
         except httpx.TimeoutException as exc:
             raise LLMError(f"LLM proxy request timed out after {self._timeout} seconds") from exc
         except httpx.HTTPError as exc:  # pragma: no cover - passthrough network errors
             raise LLMError(f"LLM proxy request failed: {exc}") from exc
 
-        try:
-            payload = response.json()
-        except ValueError as exc:
-            raise LLMError("LLM proxy returned invalid JSON.") from exc
-
-        content = _extract_content(payload).strip()
+        content = _parse_payload(response.content).strip()
         logger.debug("LLM proxy response: %s", content)
         return content
 
-    def close(self) -> None:
-        self._client.close()
+    def generate_many(self, prompts: list[str]) -> list[str]:
+        """Run several independent prompts concurrently and return their results."""
+        async def _gather() -> list[str]:
+            try:
+                return list(await asyncio.gather(*(self.agenerate(prompt) for prompt in prompts)))
+            finally:
+                # asyncio.run tears this loop down on return; close the
+                # loop's client first so its keep-alive sockets are released
+                # instead of leaked with the dead loop.
+                await _close_running_loop_client()
 
-    def __del__(self) -> None:  # pragma: no cover - best effort cleanup
-        try:
-            self.close()
-        except Exception:  # noqa: broad-except
-            pass
+        return asyncio.run(_gather())
+
+    def close(self) -> None:
+        """Close the shared HTTP clients (process-wide; affects all instances)."""
+        global _SHARED_CLIENT
+        if _SHARED_CLIENT is not None:
+            _SHARED_CLIENT.close()
+            _SHARED_CLIENT = None
+        with _ASYNC_CLIENTS_LOCK:
+            async_clients = list(_ASYNC_CLIENTS.values())
+            _ASYNC_CLIENTS.clear()
+        for client in async_clients:
+            try:
+                asyncio.run(client.aclose())
+            except RuntimeError:  # pragma: no cover - already inside a running loop
+                pass
 
@@ -2,8 +2,9 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import re
 from enum import Enum, auto
+from typing import NamedTuple
 
 
 class Intent(Enum):
@@ -12,12 +13,11 @@ class Intent(Enum):
     CHART = auto()
 
 
-@dataclass(frozen=True)
-class Plan:
+class Plan(NamedTuple):
     intent: Intent
 
 
-SQL_KEYWORDS = {
+SQL_KEYWORDS = frozenset({
     "show",
     "list",
     "average",
@@ -27,9 +27,9 @@ SQL_KEYWORDS = {
     "table",
     "query",
     "select",
-}
+})
 
-ETL_KEYWORDS = {
+ETL_KEYWORDS = frozenset({
     "load",
     "ingest",
     "transform",
@@ -56,19 +56,29 @@ ETL_KEYWORDS = {
     "etl",
     "stage",
     "prepare",
-}
-CHART_KEYWORDS = {"chart", "plot", "graph", "visualize", "visualise", "visualization", "dashboard", "plotly"}
+})
+CHART_KEYWORDS = frozenset(
+    {"chart", "plot", "graph", "visualize", "visualise", "visualization", "dashboard", "plotly"}
+)
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tokenize(prompt: str) -> frozenset[str]:
+    """Lower and split a prompt into a token set for O(1) keyword lookups."""
+    return frozenset(_TOKEN_RE.findall(prompt.lower()))
 
 
 def plan_intent(prompt: str) -> Plan:
     """Very lightweight keyword-based intent classifier."""
-    lowered = prompt.lower()
-    if any(word in lowered for word in CHART_KEYWORDS):
+    tokens = _tokenize(prompt)
+    if tokens & CHART_KEYWORDS:
         return Plan(intent=Intent.CHART)
-    if any(word in lowered for word in ETL_KEYWORDS):
+    if tokens & ETL_KEYWORDS:
         return Plan(intent=Intent.ETL)
     # Default to SQL path
-    if any(word in lowered for word in SQL_KEYWORDS):
+    if tokens & SQL_KEYWORDS:
         return Plan(intent=Intent.SQL)
     # Fallback: assume SQL but future iteration can call LLM
     return Plan(intent=Intent.SQL)
@@ -1,69 +1,195 @@
-"""Prompt builders for the Lambda-hosted SQL and ETL generators."""
+"""Prompt builders for the Lambda-hosted SQL and ETL generators.
+
+Prompts are assembled static-prefix-first: the invariant instruction block
+(and near-stable retrieved context) come before the per-request dynamic
+fields, which sit after a visible ``--- REQUEST ---`` sentinel. Keeping the
+prefix byte-identical across requests maximizes provider-side prompt-cache
+hits; an outer caller can place a cache checkpoint at the sentinel.
+"""
 
 from __future__ import annotations
 
-from typing import Mapping, Sequence
+from functools import lru_cache
+from typing import Mapping, NamedTuple, Sequence
 
+DYNAMIC_BOUNDARY = "--- REQUEST ---"
 
-def build_sql_prompt(
+_SQL_INSTRUCTIONS = (
+    "You are an expert healthcare data analyst. "
+    "Write a single read-only SQL query (SELECT or CTE) that answers the question below using the provided context. "
+    "Use only the tables and columns documented, prefer schema-qualified names such as healthcare_demo.table_name when in doubt, "
+    "and do not fabricate columns or tables. "
+    "Important: Use only entities (tables, codes, conditions, measures) explicitly mentioned in the current question; "
+    "do not introduce unrelated conditions/codes or extra joins that are not required. "
+    "Rules: no DML/DDL; no table creation; list explicit column names; include LIMIT {limit} or a smaller value; "
+    "do not add commentary—return only the SQL."
+)
+
+# Repair-specific guidance lives after the dynamic boundary (see
+# build_sql_repair_prompt) so repair turns reuse the byte-identical static
+# prefix of the first attempt and hit provider-side prompt caches.
+_SQL_REPAIR_TASK = (
+    "The SQL above failed with the error shown. Produce a corrected query: "
+    "stick strictly to documented healthcare_demo tables and columns, drop any joins or filters "
+    "unrelated to the user's question, and do not introduce diseases, codes, or metrics "
+    "the question does not mention."
+)
+
+_ETL_INSTRUCTIONS = (
+    "You are an ETL specialist. Interpret the user request and select the appropriate target table "
+    "from the documented healthcare datasets (patients, encounters, conditions, observations, medications, procedures). "
+    "If the user wants the entire pipeline, respond with {\"table\": \"all\"}; otherwise pick the most relevant single table. "
+    "Respond with a compact JSON object matching the schema {\"table\": \"<table_name>\"}. "
+    "Only use lowercase singular table names from the list (or 'all'); do not fabricate new tables."
+)
+
+_SCHEMA_MAPPING_INSTRUCTIONS = (
+    "You are an ETL planner. Map the available source columns to the destination schema. "
+    "For each target column, pick the best matching source column. "
+    "If you cannot find a match, reuse the target column name so downstream validation can fill it manually. "
+    "Return JSON with the shape {\"columns\": {\"target_column\": \"source_column\"}} and nothing else."
+)
+
+_SCHEMA_MAPPING_BATCH_INSTRUCTIONS = (
+    "You are an ETL planner. Map the available source columns to the destination schema "
+    "for every table listed below. "
+    "For each target column, pick the best matching source column. "
+    "If you cannot find a match, reuse the target column name so downstream validation can fill it manually. "
+    "Return JSON with the shape {\"<table_name>\": {\"target_column\": \"source_column\"}} "
+    "covering every listed table, and nothing else."
+)
+
+
+@lru_cache(maxsize=16)
+def _sql_static_prefix(limit: int, guidance: str | None) -> str:
+    """Render the invariant SQL instruction block once per (limit, guidance)."""
+    instructions = _SQL_INSTRUCTIONS.format(limit=limit)
+    if guidance:
+        instructions += f"\n\nDomain/Vocabulary Guidance:\n{guidance.strip()}"
+    return instructions
+
+
+# Specialize the instruction block for the LIMIT values seen in practice at
+# import time, so even the first request is a pure cache lookup.
+for _limit in (10, 50, 100, 200, 500, 1000):
+    _sql_static_prefix(_limit, None)
+del _limit
+
+
+@lru_cache(maxsize=256)
+def _render_context_cached(context_chunks: tuple[str, ...]) -> str:
+    return "\n\n".join(f"[Context #{idx + 1}]\n{chunk}" for idx, chunk in enumerate(context_chunks))
+
+
+def _render_context(context_chunks: Sequence[str]) -> str:
+    """Render context chunks, memoized — retrieval output repeats across a session."""
+    return _render_context_cached(tuple(context_chunks))
+
+
+@lru_cache(maxsize=64)
+def _sql_prompt_cached(
     user_prompt: str,
-    context_chunks: Sequence[str],
-    *,
+    context_chunks: tuple[str, ...],
     limit: int,
-    guidance: str | None = None,
+    guidance: str | None,
 ) -> str:
-    """Render a single prompt string for the SQL generation proxy."""
-    context = "\n\n".join(f"[Context #{idx + 1}]\n{chunk}" for idx, chunk in enumerate(context_chunks))
-    instructions = (
-        "You are an expert healthcare data analyst. "
-        "Write a single read-only SQL query (SELECT or CTE) that answers the question below using the provided context. "
-        "Use only the tables and columns documented, prefer schema-qualified names such as healthcare_demo.table_name when in doubt, "
-        "and do not fabricate columns or tables. "
-        "Important: Use only entities (tables, codes, conditions, measures) explicitly mentioned in the current question; "
-        "do not introduce unrelated conditions/codes or extra joins that are not required. "
-        f"Rules: no DML/DDL; no table creation; list explicit column names; include LIMIT {limit} or a smaller value; "
-        "do not add commentary—return only the SQL."
-    )
-    if guidance:
-        instructions += f"\n\nDomain/Vocabulary Guidance:\n{guidance.strip()}"
     return (
-        f"{instructions}\n\n"
-        f"Context Documentation:\n{context}\n\n"
+        f"{_sql_static_prefix(limit, guidance)}\n\n"
+        f"Context Documentation:\n{_render_context_cached(context_chunks)}\n\n"
+        f"{DYNAMIC_BOUNDARY}\n"
         f"User Question:\n{user_prompt.strip()}\n\n"
         "Return only the SQL query."
     )
 
 
-def build_sql_repair_prompt(
+def build_sql_prompt(
     user_prompt: str,
     context_chunks: Sequence[str],
-    previous_sql: str,
-    error_summary: str,
     *,
     limit: int,
     guidance: str | None = None,
 ) -> str:
-    """Prompt variant guiding the LLM to repair a failing SQL query."""
-    context = "\n\n".join(f"[Context #{idx + 1}]\n{chunk}" for idx, chunk in enumerate(context_chunks))
-    instructions = (
-        "You previously generated a SQL query that failed during execution. "
-        "Using the same documentation, produce a corrected SQL query that fixes the issue described below. "
-        "Stick strictly to documented healthcare_demo tables and columns; do not invent new fields. "
-        "Important: Drop any joins/filters that are unrelated to the user’s question; "
-        "avoid introducing diseases/codes/metrics not mentioned in the question. "
-        f"Rules: write a single read-only SQL statement (SELECT or CTE); avoid DML/DDL; include LIMIT {limit} or a smaller value; "
-        "ensure column names exactly match the schema; return only the SQL."
-    )
-    if guidance:
-        instructions += f"\n\nDomain/Vocabulary Guidance:\n{guidance.strip()}"
-    return (
-        f"{instructions}\n\n"
-        f"Context Documentation:\n{context}\n\n"
-        f"User Question:\n{user_prompt.strip()}\n\n"
-        f"Previous SQL:\n{previous_sql.strip()}\n\n"
-        f"Execution Error:\n{error_summary.strip()}\n\n"
-        "Return only the corrected SQL query."
-    )
+    """Render a single prompt string for the SQL generation proxy.
+
+    Memoized so retry iterations (and repeated questions against the same
+    retrieved context) skip re-rendering the full prompt string.
+    """
+    return _sql_prompt_cached(user_prompt, tuple(context_chunks), limit, guidance)
+
+
+class RepairInputs(NamedTuple):
+    """Pre-stripped dynamic fields for the SQL repair prompt.
+
+    Built once per attempt by the retry loop, so the invariant user prompt
+    is not re-stripped (and re-allocated) on every repair iteration.
+    """
+
+    user_prompt: str
+    previous_sql: str
+    error_summary: str
+
+    @classmethod
+    def build(cls, user_prompt: str, previous_sql: str, error_summary: str) -> "RepairInputs":
+        return cls(user_prompt.strip(), previous_sql.strip(), error_summary.strip())
+
+
+def build_sql_repair_prompt(
+    inputs: RepairInputs,
+    context_chunks: Sequence[str],
+    *,
+    limit: int,
+    guidance: str | None = None,
+    hint: str | None = None,
+) -> str:
+    """Prompt variant guiding the LLM to repair a failing SQL query.
+
+    Shares the byte-identical static prefix (instructions + guidance +
+    context) with :func:`build_sql_prompt`; everything repair-specific,
+    including the optional structural ``hint``, sits after the dynamic
+    boundary so provider prompt caches hit on repair turns.
+    """
+    parts = [
+        _sql_static_prefix(limit, guidance),
+        "\n\nContext Documentation:\n",
+        _render_context(context_chunks),
+        "\n\n",
+        DYNAMIC_BOUNDARY,
+        "\nUser Question:\n",
+        inputs.user_prompt,
+        "\n\nPrevious SQL:\n",
+        inputs.previous_sql,
+        "\n\nExecution Error:\n",
+        inputs.error_summary,
+        "\n\n",
+        _SQL_REPAIR_TASK,
+    ]
+    if hint:
+        parts.append(f"\n- {hint}")
+    parts.append("\n\nReturn only the corrected SQL query.")
+    return "".join(parts)
+
+
+# Structural hints used to diversify speculative repair attempts; each
+# variant nudges the LLM toward a different query shape.
+_REPAIR_VARIANT_HINTS = (
+    "Prefer restructuring the query with CTEs (WITH ...) if it helps correctness.",
+    "Prefer plain subqueries over CTEs and keep the statement compact.",
+)
+
+
+def build_sql_repair_prompt_variants(
+    inputs: RepairInputs,
+    context_chunks: Sequence[str],
+    *,
+    limit: int,
+    guidance: str | None = None,
+    n: int = 2,
+) -> list[str]:
+    """Differently-hinted repair prompts for speculative parallel attempts."""
+    return [
+        build_sql_repair_prompt(inputs, context_chunks, limit=limit, guidance=guidance, hint=hint)
+        for hint in _REPAIR_VARIANT_HINTS[:n]
+    ]
 
 
 def build_etl_prompt(
@@ -73,30 +199,54 @@ def build_etl_prompt(
     error_history: Sequence[str] | None = None,
 ) -> str:
     """Prompt to obtain ETL directives (e.g., which table to process)."""
-    context = "\n\n".join(f"[Context #{idx + 1}]\n{chunk}" for idx, chunk in enumerate(context_chunks))
-    instructions = (
-        "You are an ETL specialist. Interpret the user request and select the appropriate target table "
-        "from the documented healthcare datasets (patients, encounters, conditions, observations, medications, procedures). "
-        "If the user wants the entire pipeline, respond with {\"table\": \"all\"}; otherwise pick the most relevant single table. "
-        "Respond with a compact JSON object matching the schema {\"table\": \"<table_name>\"}. "
-        "Only use lowercase singular table names from the list (or 'all'); do not fabricate new tables."
-    )
+    dynamic_parts = [f"User Request:\n{user_prompt.strip()}"]
     if error_history:
         history = "\n".join(f"- {entry.strip()}" for entry in error_history if entry.strip())
         if history:
-            instructions += (
-                "\nPrevious attempts failed:\n"
+            dynamic_parts.append(
+                "Previous attempts failed:\n"
                 f"{history}\n"
                 "Adjust your directive to avoid repeating the same error."
             )
+    dynamic_block = "\n\n".join(dynamic_parts)
     return (
-        f"{instructions}\n\n"
-        f"Context Documentation:\n{context}\n\n"
-        f"User Request:\n{user_prompt.strip()}\n\n"
+        f"{_ETL_INSTRUCTIONS}\n\n"
+        f"Context Documentation:\n{_render_context(context_chunks)}\n\n"
+        f"{DYNAMIC_BOUNDARY}\n"
+        f"{dynamic_block}\n\n"
         "Return ONLY the JSON object (no explanatory text)."
     )
 
 
+def _manifest_hints(manifest_transform: Mapping[str, object] | None) -> str:
+    """Render manifest transform hints, skipping keys the mapper handles itself."""
+    if not manifest_transform or not isinstance(manifest_transform, Mapping):
+        return ""
+    hints = [
+        f"{key}: {value}"
+        for key, value in manifest_transform.items()
+        if key not in {"auto_mapping", "schema_config", "max_records"}
+    ]
+    if not hints:
+        return ""
+    return "\nManifest hints:\n" + "\n".join(f"- {hint}" for hint in hints)
+
+
+def _schema_mapping_section(
+    table_name: str,
+    source_columns: Sequence[str],
+    target_columns: Sequence[str],
+    manifest_transform: Mapping[str, object] | None,
+) -> str:
+    source_list = "\n".join(f"- {column}" for column in source_columns)
+    target_list = "\n".join(f"- {column}" for column in target_columns)
+    return (
+        f"Target table: {table_name}\n"
+        f"Target columns:\n{target_list}\n\n"
+        f"Source columns:\n{source_list}{_manifest_hints(manifest_transform)}"
+    )
+
+
 def build_schema_mapping_prompt(
     *,
     table_name: str,
@@ -106,31 +256,33 @@ def build_schema_mapping_prompt(
 ) -> str:
     """Prompt the LLM to map source columns to the target table schema."""
 
-    source_list = "\n".join(f"- {column}" for column in source_columns)
-    target_list = "\n".join(f"- {column}" for column in target_columns)
-
-    extras = ""
-    if manifest_transform:
-        hints = []
-        if isinstance(manifest_transform, Mapping):
-            for key, value in manifest_transform.items():
-                if key in {"auto_mapping", "schema_config", "max_records"}:
-                    continue
-                hints.append(f"{key}: {value}")
-        if hints:
-            extras = "\nManifest hints:\n" + "\n".join(f"- {hint}" for hint in hints)
-
-    instructions = (
-        "You are an ETL planner. Map the available source columns to the destination schema. "
-        "For each target column, pick the best matching source column. "
-        "If you cannot find a match, reuse the target column name so downstream validation can fill it manually. "
-        "Return JSON with the shape {\"columns\": {\"target_column\": \"source_column\"}} and nothing else."
+    return (
+        f"{_SCHEMA_MAPPING_INSTRUCTIONS}\n\n"
+        f"{DYNAMIC_BOUNDARY}\n"
+        f"{_schema_mapping_section(table_name, source_columns, target_columns, manifest_transform)}\n\n"
+        "JSON only; no markdown fences."
     )
 
+
+def build_schema_mapping_batch_prompt(tables: Sequence[Mapping[str, object]]) -> str:
+    """Prompt the LLM to map several tables' columns in one round trip.
+
+    Each entry mirrors the keyword arguments of
+    :func:`build_schema_mapping_prompt` (``table_name``, ``source_columns``,
+    ``target_columns``, optional ``manifest_transform``).
+    """
+    sections = "\n\n---\n\n".join(
+        _schema_mapping_section(
+            str(spec["table_name"]),
+            spec["source_columns"],  # type: ignore[arg-type]
+            spec["target_columns"],  # type: ignore[arg-type]
+            spec.get("manifest_transform"),  # type: ignore[arg-type]
+        )
+        for spec in tables
+    )
     return (
-        f"{instructions}\n\n"
-        f"Target table: {table_name}\n"
-        f"Target columns:\n{target_list}\n\n"
-        f"Source columns:\n{source_list}{extras}\n\n"
+        f"{_SCHEMA_MAPPING_BATCH_INSTRUCTIONS}\n\n"
+        f"{DYNAMIC_BOUNDARY}\n"
+        f"{sections}\n\n"
         "JSON only; no markdown fences."
-    )
\ No newline at end of file
+    )
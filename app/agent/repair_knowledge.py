@@ -3,16 +3,33 @@
 from __future__ import annotations
 
 import json
+import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterable
 
+from app.core.json_store import DebouncedJsonWriter
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
 KNOWLEDGE_PATH = Path(".cache/etl_repair_knowledge.json")
 
+# (epoch second, rendered ISO string) — strategies only need second
+# granularity, so the timestamp is reformatted at most once per second
+# even under burst writes.
+_TS_CACHE: tuple[int, str] = (-1, "")
+
+
+def _now_iso() -> str:
+    global _TS_CACHE
+    now = int(time.time())
+    cached_second, cached_value = _TS_CACHE
+    if now != cached_second:
+        cached_value = datetime.fromtimestamp(now, tz=timezone.utc).isoformat(timespec="seconds")
+        _TS_CACHE = (now, cached_value)
+    return cached_value
+
 
 class RepairKnowledge:
     """Stores per-table strategies that resolved previous ETL load failures."""
@@ -20,6 +37,7 @@ class RepairKnowledge:
     def __init__(self, path: Path | None = None) -> None:
         self._path = path or KNOWLEDGE_PATH
         self._data: Dict[str, Dict[str, object]] = {}
+        self._writer = DebouncedJsonWriter(self._path)
         self._load()
 
     def _load(self) -> None:
@@ -37,9 +55,9 @@ class RepairKnowledge:
                     self._data[table] = dict(entry)
 
     def _save(self) -> None:
-        payload = {"tables": self._data}
-        self._path.parent.mkdir(parents=True, exist_ok=True)
-        self._path.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+        # Snapshot handed to the background writer; callers in the ETL retry
+        # loop never block on serialization or disk I/O.
+        self._writer.submit({"tables": {table: dict(entry) for table, entry in self._data.items()}})
 
     def get_strategy(self, table: str) -> str | None:
         entry = self._data.get(table)
@@ -48,11 +66,24 @@ class RepairKnowledge:
         strategy = entry.get("strategy")
         return str(strategy) if isinstance(strategy, str) else None
 
+    def get_strategies(self, tables: Iterable[str]) -> Dict[str, str]:
+        """Look up stored strategies for several tables in one call.
+
+        Only tables with a recorded strategy appear in the result, so
+        callers can use ``.get(table)`` with their own default.
+        """
+        strategies: Dict[str, str] = {}
+        for table in tables:
+            strategy = self.get_strategy(table)
+            if strategy is not None:
+                strategies[table] = strategy
+        return strategies
+
     def record_strategy(self, table: str, strategy: str, error: str | None = None) -> None:
         self._data[table] = {
             "strategy": strategy,
             "last_error": error,
-            "updated_at": datetime.now(tz=timezone.utc).isoformat(),
+            "updated_at": _now_iso(),
         }
         self._save()
 
@@ -2,9 +2,18 @@
 
 from __future__ import annotations
 
-from typing import List
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional
 
 import chromadb
+import numpy as np
 from chromadb.api.models.Collection import Collection
 from chromadb.utils import embedding_functions
 
@@ -14,11 +23,43 @@ from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+_EXACT_CACHE_SIZE = 512
+_SEMANTIC_CACHE_SIZE = 256
+_SEMANTIC_SIM_THRESHOLD = 0.97
+_EMBEDDING_CACHE_SIZE = 512
+# Cached retrieval results expire so a re-indexed corpus is picked up
+# without restarting the service; embeddings themselves never go stale.
+_RESULT_CACHE_TTL_SECONDS = 300.0
+
+# One compiled scan classifies a source path instead of five separate
+# substring/suffix tests; group index -> score contribution. etl_fewshots
+# carries the folded -10 it previously accrued from two overlapping rules.
+_SOURCE_CLS_RE = re.compile(
+    r"(schema_docs)"
+    r"|(etl_schema_config\.md$)"
+    r"|(etl_overview\.md$)"
+    r"|(etl_fewshots)"
+    r"|(nl_sql_examples|fewshot|examples)"
+)
+_SOURCE_GROUP_SCORES = (0, 10, 6, 6, -10, -5)
+
+
+@lru_cache(maxsize=1024)
+def _source_score(source: str) -> int:
+    """Score a lowercased source path for rerank ordering."""
+    matched_groups = {match.lastindex for match in _SOURCE_CLS_RE.finditer(source)}
+    return sum(_SOURCE_GROUP_SCORES[group] for group in matched_groups if group)
+
 
 class RetrievalError(RuntimeError):
     """Raised when the retriever cannot fetch context."""
 
 
+# Serialises the delete+recreate recovery branch so concurrent workers never
+# race on the same collection.
+_COLLECTION_RECOVERY_LOCK = threading.Lock()
+
+
 class ChromaRetriever:
     """Wrapper around Chroma persistent collection for document retrieval."""
 
@@ -61,53 +102,311 @@ class ChromaRetriever:
         except ValueError as exc:
             if "embedding function conflict" in str(exc).lower():
                 logger.info("Existing collection uses different embedding; recreating '%s'.", collection_name)
-                self._client.delete_collection(collection_name)
-                collection = self._client.get_or_create_collection(
-                    name=collection_name,
-                    embedding_function=self._embedding_fn,
-                )
+                with _COLLECTION_RECOVERY_LOCK:
+                    self._client.delete_collection(collection_name)
+                    collection = self._client.get_or_create_collection(
+                        name=collection_name,
+                        embedding_function=self._embedding_fn,
+                    )
             else:
                 raise
 
         self._collection = collection
 
+        # Two-tier retrieval cache: exact-match on query text, then
+        # embedding-similarity against recently seen queries. Entries carry
+        # the insertion timestamp and expire after _RESULT_CACHE_TTL_SECONDS.
+        # The retriever is a shared singleton hit from worker threads and
+        # the speculative-retrieval task concurrently, so every cache
+        # mutation below happens under one lock (mirroring TTLCache); in
+        # particular the semantic matrix and its docs list must move in
+        # lockstep or hits pair docs with the wrong embedding.
+        self._cache_lock = threading.Lock()
+        self._exact_cache: OrderedDict[str, tuple[float, List[str]]] = OrderedDict()
+        self._semantic_embeddings: np.ndarray | None = None  # [N, D] float32, L2-normalised
+        self._semantic_docs: List[tuple[float, List[str]]] = []
+
+        # Query-text -> normalised embedding, so the repair loop (and any
+        # retrieval with a different top_k) reuses the first embedding RTT.
+        self._embedding_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+
+        # Lazily computed metadata filter for schema docs; None once computed
+        # means the collection has no schema-doc sources to bias towards.
+        self._schema_where: Optional[dict] = None
+        self._schema_where_resolved = False
+        self._query_pool = ThreadPoolExecutor(max_workers=2)
+
     @property
     def collection(self) -> Collection:
         return self._collection
 
+    def warmup(self) -> None:
+        """Touch the collection and schema filter ahead of the first query.
+
+        Opens Chroma's persistent store and resolves the lazily built
+        schema-doc filter off the critical path of the first request.
+        """
+        self._collection.count()
+        self._schema_doc_filter()
+
+    @staticmethod
+    def _exact_key(query: str, k: int) -> str:
+        return f"{k}:{hashlib.sha1(query.encode('utf-8')).hexdigest()}"
+
+    def _exact_get(self, key: str) -> Optional[List[str]]:
+        with self._cache_lock:
+            entry = self._exact_cache.get(key)
+            if entry is None:
+                return None
+            stored_at, docs = entry
+            if time.monotonic() - stored_at > _RESULT_CACHE_TTL_SECONDS:
+                self._exact_cache.pop(key, None)
+                return None
+            self._exact_cache.move_to_end(key)
+            return list(docs)
+
+    def _exact_put(self, key: str, docs: List[str]) -> None:
+        with self._cache_lock:
+            self._exact_cache[key] = (time.monotonic(), list(docs))
+            self._exact_cache.move_to_end(key)
+            while len(self._exact_cache) > _EXACT_CACHE_SIZE:
+                self._exact_cache.popitem(last=False)
+
+    def _semantic_get(self, embedding: np.ndarray) -> Optional[List[str]]:
+        with self._cache_lock:
+            if self._semantic_embeddings is None or not self._semantic_docs:
+                return None
+            sims = self._semantic_embeddings @ embedding
+            best = int(np.argmax(sims))
+            if sims[best] >= _SEMANTIC_SIM_THRESHOLD:
+                stored_at, docs = self._semantic_docs[best]
+                if time.monotonic() - stored_at > _RESULT_CACHE_TTL_SECONDS:
+                    return None
+                return list(docs)
+            return None
+
+    def _semantic_put(self, embedding: np.ndarray, docs: List[str]) -> None:
+        row = embedding.reshape(1, -1)
+        with self._cache_lock:
+            if self._semantic_embeddings is None:
+                self._semantic_embeddings = row
+            else:
+                self._semantic_embeddings = np.vstack([self._semantic_embeddings, row])
+            self._semantic_docs.append((time.monotonic(), list(docs)))
+            if len(self._semantic_docs) > _SEMANTIC_CACHE_SIZE:
+                self._semantic_embeddings = self._semantic_embeddings[1:]
+                self._semantic_docs.pop(0)
+
+    def embed(self, query: str) -> np.ndarray:
+        """Return the L2-normalised embedding for a query, cached by text."""
+        return self._embed_many([query])[0]
+
+    def _embed_many(self, texts: List[str]) -> np.ndarray:
+        """Embed texts, batching cache misses into one proxy round-trip."""
+        rows: List[Optional[np.ndarray]] = []
+        to_embed: List[str] = []
+        with self._cache_lock:
+            for text in texts:
+                cached = self._embedding_cache.get(text)
+                if cached is not None:
+                    self._embedding_cache.move_to_end(text)
+                else:
+                    to_embed.append(text)
+                rows.append(cached)
+        if to_embed:
+            # The proxy round-trip runs outside the lock; only the cache
+            # fill is a critical section.
+            fresh = np.asarray(self._embedding_fn(to_embed), dtype=np.float32)
+            norms = np.linalg.norm(fresh, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            fresh = fresh / norms
+            fresh_iter = iter(fresh)
+            with self._cache_lock:
+                for idx, row in enumerate(rows):
+                    if row is None:
+                        embedding = next(fresh_iter)
+                        rows[idx] = embedding
+                        self._embedding_cache[texts[idx]] = embedding
+                while len(self._embedding_cache) > _EMBEDDING_CACHE_SIZE:
+                    self._embedding_cache.popitem(last=False)
+        return np.vstack(rows)
+
     def retrieve(self, query: str, *, top_k: int = 4) -> List[str]:
         """Return relevant context chunks for the provided query."""
+        return self.retrieve_many([query], top_k=top_k)[0]
+
+    async def aretrieve(self, query: str, *, top_k: int = 4) -> List[str]:
+        """Async variant of :meth:`retrieve`.
+
+        Chroma's persistent client is synchronous, so the blocking work runs
+        in a worker thread and the event loop stays free for other I/O.
+        """
+        return await asyncio.to_thread(self.retrieve, query, top_k=top_k)
+
+    def retrieve_many(self, queries: List[str], *, top_k: int = 4) -> List[List[str]]:
+        """Retrieve context for several queries in one batched Chroma call.
+
+        A single ``query_texts=[...]`` call embeds all queries in one proxy
+        round-trip instead of one HTTP call per query.
+        """
         k = top_k or self._top_k
-        # Fetch extra to allow re-ranking by source
-        fetch_k = max(k * 2, 8) if self._bias_schema_docs else k
-        results = self._collection.query(
-            query_texts=[query],
-            n_results=fetch_k,
-        )
-        documents = results.get("documents")
-        metadatas = results.get("metadatas")
-        if not documents or not documents[0]:
-            raise RetrievalError("No documents retrieved from vector store.")
-        docs = documents[0]
-        metas = metadatas[0] if metadatas and metadatas[0] else [{} for _ in docs]
+        resolved: List[Optional[List[str]]] = [None] * len(queries)
+        miss_positions: List[int] = []
+        for idx, query in enumerate(queries):
+            cached = self._exact_get(self._exact_key(query, k))
+            if cached is not None:
+                resolved[idx] = cached
+            else:
+                miss_positions.append(idx)
+
+        if not miss_positions:
+            return [docs for docs in resolved if docs is not None]
+
+        # Embed all misses in one proxy round-trip; the embeddings feed both
+        # the semantic cache probe and the ANN query (no double embedding).
+        miss_queries = [queries[idx] for idx in miss_positions]
+        embeddings = self._embed_many(miss_queries)
+
+        ann_positions: List[int] = []
+        for row, idx in enumerate(miss_positions):
+            semantic_hit = self._semantic_get(embeddings[row])
+            if semantic_hit is not None:
+                resolved[idx] = semantic_hit
+                self._exact_put(self._exact_key(queries[idx], k), semantic_hit)
+            else:
+                ann_positions.append(row)
+
+        if ann_positions:
+            query_embeddings = [embeddings[row].tolist() for row in ann_positions]
+            schema_where = self._schema_doc_filter() if self._bias_schema_docs else None
+            if schema_where is not None:
+                # Two parallel ANN queries of size k (schema-filtered and
+                # unrestricted) instead of one 2k over-fetch that is trimmed
+                # in Python; results are merged and deduped by doc id.
+                biased_future = self._query_pool.submit(
+                    self._collection.query,
+                    query_embeddings=query_embeddings,
+                    n_results=k,
+                    where=schema_where,
+                )
+                results = self._collection.query(
+                    query_embeddings=query_embeddings,
+                    n_results=k,
+                )
+                biased_results = biased_future.result()
+            else:
+                results = self._collection.query(
+                    query_embeddings=query_embeddings,
+                    n_results=k,
+                )
+                biased_results = None
+            documents = results.get("documents")
+            if not documents or not documents[0]:
+                raise RetrievalError("No documents retrieved from vector store.")
+            for result_row, row in enumerate(ann_positions):
+                docs, metas = self._merge_row(results, biased_results, result_row)
+                reranked = self._rerank(docs, metas, k)
+                idx = miss_positions[row]
+                resolved[idx] = reranked
+                self._exact_put(self._exact_key(queries[idx], k), reranked)
+                self._semantic_put(embeddings[row], reranked)
+
+        return [docs if docs is not None else [] for docs in resolved]
+
+    def _schema_doc_filter(self) -> Optional[dict]:
+        """Return a metadata ``where`` filter selecting schema-doc chunks.
+
+        Chroma metadata filters only support exact matches, so the distinct
+        ``source`` values containing ``schema_docs`` are enumerated once from
+        the collection and matched via ``$in``.
+        """
+        if not self._schema_where_resolved:
+            self._schema_where_resolved = True
+            try:
+                records = self._collection.get(include=["metadatas"])
+            except Exception as exc:  # pragma: no cover - degraded Chroma API
+                logger.warning("Could not enumerate collection sources: %s", exc)
+                records = None
+            sources = {
+                str((meta or {}).get("source", ""))
+                for meta in ((records or {}).get("metadatas") or [])
+            }
+            schema_sources = sorted(s for s in sources if "schema_docs" in s.lower())
+            if schema_sources:
+                self._schema_where = {"source": {"$in": schema_sources}}
+        return self._schema_where
+
+    @staticmethod
+    def _merge_row(
+        results: dict, biased_results: Optional[dict], result_row: int
+    ) -> tuple[List[str], List[dict]]:
+        """Merge unrestricted and schema-filtered results for one query row.
+
+        The unrestricted hits come first (true distance order); filtered hits
+        not already present are appended and rely on their rerank boost to
+        sort ahead.
+        """
+        docs: List[str] = []
+        metas: List[dict] = []
+        seen: set = set()
+        for source in (results, biased_results):
+            if not source:
+                continue
+            row_ids = (source.get("ids") or [[]])[result_row] if result_row < len(source.get("ids") or []) else []
+            row_docs = (source.get("documents") or [[]])[result_row] if result_row < len(source.get("documents") or []) else []
+            row_metas = source.get("metadatas")
+            row_metas = (
+                row_metas[result_row]
+                if row_metas and result_row < len(row_metas) and row_metas[result_row]
+                else [{} for _ in row_docs]
+            )
+            for doc_id, doc, meta in zip(row_ids, row_docs, row_metas):
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                docs.append(doc)
+                metas.append(meta or {})
+        return docs, metas
+
+    def _rerank(self, docs: List[str], metas: List[dict], k: int) -> List[str]:
         if not self._bias_schema_docs:
             return docs[:k]
 
-        # Prefer schema docs and core schema references over examples
-        scored: list[tuple[int, str]] = []
-        for idx, (doc, meta) in enumerate(zip(docs, metas)):
-            source = str((meta or {}).get("source", "")).lower()
-            # Higher score => earlier in list
-            score = 0
-            if "schema_docs" in source or "/schema_docs/" in source:
-                score += 10
-            if source.endswith("etl_schema_config.md") or source.endswith("etl_overview.md"):
-                score += 6
-            if "nl_sql_examples" in source or "fewshot" in source or "examples" in source:
-                score -= 5
-            if "etl_fewshots" in source:
-                score -= 5
-            scored.append((score, doc))
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return [doc for _, doc in scored[:k]]
+        # Prefer schema docs and core schema references over examples.
+        # Each source is classified by one compiled regex scan (memoized —
+        # the same paths recur across queries); higher score => earlier.
+        scores = np.fromiter(
+            (_source_score(str((meta or {}).get("source", "")).lower()) for meta in metas),
+            dtype=np.int32,
+            count=len(docs),
+        )
+
+        if k < len(docs):
+            selected = np.argpartition(-scores, k - 1)[:k]
+        else:
+            selected = np.arange(len(docs))
+        # Order by score descending, original (distance) order on ties.
+        ordered = selected[np.lexsort((selected, -scores[selected]))]
+        return [docs[idx] for idx in ordered]
+
+
+
+@lru_cache(maxsize=4)
+def _retriever_for(persist_directory: str, collection_name: str, embedding_proxy_url: str | None) -> ChromaRetriever:
+    return ChromaRetriever()
+
+
+def get_retriever() -> ChromaRetriever:
+    """Return the process-wide retriever for the configured vector store.
 
+    Constructing a ``ChromaRetriever`` opens the persistent client and
+    handshakes the collection, so instances are cached per store
+    configuration and shared across requests; the retrieval caches then
+    accumulate instead of resetting on every instantiation.
+    """
+    vector_store = get_settings().vector_store
+    return _retriever_for(
+        vector_store.persist_directory,
+        vector_store.collection_name,
+        vector_store.embedding_proxy_url,
+    )
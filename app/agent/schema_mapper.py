@@ -2,13 +2,26 @@
 
 from __future__ import annotations
 
-import hashlib
-import json
+import atexit
+import os
+import re
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Callable, Dict, Iterable, Mapping, MutableMapping, Sequence
 
-from app.agent.prompts import build_schema_mapping_prompt
+import numpy as np
+import orjson
+
+try:
+    from xxhash import xxh3_128_hexdigest as _digest_hex
+except ImportError:  # pragma: no cover - optional fast-hash dependency
+    import hashlib
+
+    def _digest_hex(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+from app.agent.prompts import build_schema_mapping_batch_prompt, build_schema_mapping_prompt
 from app.agent.validator import summarize_exception
 from app.core.logging import get_logger
 from app.etl.manifest import ETLManifest
@@ -18,49 +31,179 @@ logger = get_logger(__name__)
 
 CACHE_PATH = Path(".cache/etl_cache.json")
 
+# Anchored fence matcher: unwraps ```/```json wrappers (and trims whitespace)
+# in one compiled scan instead of strip/startswith/slice churn per response.
+_FENCE_RE = re.compile(r"\A\s*```(?:json)?\s*(.*?)\s*```\s*\Z", re.DOTALL | re.IGNORECASE)
+
+# Semantic signature cache: column lists that drift slightly (one renamed or
+# added column) still reuse the previous mapping when their signature
+# embeddings are close enough.
+_SIGNATURE_SIM_THRESHOLD = 0.95
+_SIGNATURE_CACHE_SIZE = 128
+
+# Appends tolerated before the NDJSON cache log is rewritten without
+# superseded lines.
+_COMPACT_EVERY = 256
+
 
 class SchemaMappingError(RuntimeError):
     """Raised when schema mapping generation fails."""
 
 
+@lru_cache(maxsize=1024)
+def _cache_key_impl(
+    table: str,
+    source_columns: tuple[str, ...],
+    target_columns: tuple[str, ...],
+    namespace: str,
+) -> str:
+    """Digest a canonical byte layout of the key parts, memoized per shape.
+
+    The inputs are already strings, so NUL-joined concatenation replaces the
+    former sorted-JSON round trip, and xxh3 replaces MD5; repeat lookups for
+    the same table shape skip hashing entirely.
+    """
+    payload = b"\x00".join(
+        part.encode("utf-8")
+        for part in (table, namespace, "\x01".join(source_columns), "\x01".join(target_columns))
+    )
+    return f"{table}:{_digest_hex(payload)}"
+
+
 class SchemaMappingCache:
-    """Simple JSON-backed cache for schema mapping results."""
+    """Append-only NDJSON cache for schema mapping results.
+
+    Every ``set`` appends one ``{"key": ..., "mapping": ...}`` line, so the
+    write cost stays O(1) per entry instead of rewriting the whole file. The
+    log is compacted (deduplicated and rewritten atomically) every
+    ``_COMPACT_EVERY`` appends and at interpreter exit.
+    """
 
     def __init__(self, path: Path | None = None) -> None:
         self._path = path or CACHE_PATH
         self._data: MutableMapping[str, Dict[str, str]] = {}
-        self._load()
+        # Deferred until first access so constructing a mapper (e.g. during
+        # Lambda cold start) does not pay for reading and parsing the file.
+        self._loaded = False
+        self._appends_since_compact = 0
+        atexit.register(self._compact_at_exit)
 
     def _load(self) -> None:
+        self._loaded = True
         if not self._path.exists():
             return
+        raw = self._path.read_bytes()
+        if not raw.strip():
+            return
+        entries: Dict[str, Dict[str, str]] = {}
+        for line in raw.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                # Pre-log format: the whole file is one JSON document.
+                self._load_snapshot(raw)
+                return
+            if isinstance(record, dict) and isinstance(record.get("mapping"), dict) and "key" in record:
+                # Later lines override earlier ones.
+                entries[str(record["key"])] = record["mapping"]
+            elif isinstance(record, dict):
+                self._load_snapshot(raw)
+                return
+        self._data.update(entries)
+
+    def _load_snapshot(self, raw: bytes) -> None:
+        """Load the legacy whole-file JSON dict written before the log format."""
         try:
-            payload = json.loads(self._path.read_text(encoding="utf-8"))
-        except json.JSONDecodeError as exc:  # pragma: no cover - corrupted cache
+            payload = orjson.loads(raw)
+        except orjson.JSONDecodeError as exc:  # pragma: no cover - corrupted cache
             logger.warning("Schema mapping cache is invalid JSON: %s", exc)
             return
         if isinstance(payload, dict):
             self._data.update(
-                {
-                    str(key): {str(k): str(v) for k, v in value.items() if isinstance(v, (str, type(None)))}
-                    for key, value in payload.items()
-                    if isinstance(value, dict)
-                }
+                {key: value for key, value in payload.items() if isinstance(value, dict)}
             )
 
     def get(self, key: str) -> Dict[str, str] | None:
+        if not self._loaded:
+            self._load()
         value = self._data.get(key)
         if value is None:
             return None
         return dict(value)
 
     def set(self, key: str, mapping: Mapping[str, str]) -> None:
-        self._data[key] = dict(mapping)
-        self._save()
+        if not self._loaded:
+            self._load()
+        entry = dict(mapping)
+        self._data[key] = entry
+        self._append(key, entry)
 
-    def _save(self) -> None:
-        self._path.parent.mkdir(parents=True, exist_ok=True)
-        self._path.write_text(json.dumps(self._data, indent=2, sort_keys=True), encoding="utf-8")
+    def _append(self, key: str, mapping: Dict[str, str]) -> None:
+        line = orjson.dumps({"key": key, "mapping": mapping}) + b"\n"
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._path, "ab", buffering=0) as handle:
+                handle.write(line)
+        except OSError as exc:  # pragma: no cover - disk errors must not fail callers
+            logger.warning("Could not append to schema mapping cache: %s", exc)
+            return
+        self._appends_since_compact += 1
+        if self._appends_since_compact >= _COMPACT_EVERY:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the log as one deduplicated line per entry, atomically."""
+        self._appends_since_compact = 0
+        payload = b"".join(
+            orjson.dumps({"key": key, "mapping": mapping}) + b"\n"
+            for key, mapping in self._data.items()
+        )
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.parent / f"{self._path.name}.tmp"
+            tmp_path.write_bytes(payload)
+            os.replace(tmp_path, self._path)
+        except OSError as exc:  # pragma: no cover - disk errors must not fail callers
+            logger.warning("Could not compact schema mapping cache: %s", exc)
+
+    def _compact_at_exit(self) -> None:
+        if self._appends_since_compact:
+            self._compact()
+
+
+# Approximate prompt budget for one batched schema-mapping call; wider batches
+# are split so a single reply never has to cover an unbounded column count.
+_BATCH_PROMPT_CHAR_LIMIT = 12000
+
+
+@lru_cache(maxsize=256)
+def _target_key_maps(target_columns: tuple[str, ...]) -> tuple[frozenset[str], dict[str, str]]:
+    """Lookup structures for reply-key normalization, memoized per schema."""
+    return frozenset(target_columns), {column.upper(): column for column in target_columns}
+
+
+def _chunk_specs(
+    pending: Sequence[tuple[str, list[str], list[str], str]],
+) -> list[list[tuple[str, list[str], list[str], str]]]:
+    """Greedily split pending tables into prompt-sized batches."""
+    chunks: list[list[tuple[str, list[str], list[str], str]]] = []
+    current: list[tuple[str, list[str], list[str], str]] = []
+    size = 0
+    for spec in pending:
+        table, sources, targets, _ = spec
+        spec_size = len(table) + sum(len(col) + 3 for col in sources) + sum(
+            len(col) + 3 for col in targets
+        )
+        if current and size + spec_size > _BATCH_PROMPT_CHAR_LIMIT:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(spec)
+        size += spec_size
+    if current:
+        chunks.append(current)
+    return chunks
 
 
 @dataclass(frozen=True)
@@ -77,9 +220,15 @@ class SchemaMapper:
         *,
         generate_fn: Callable[[str], str],
         cache: SchemaMappingCache | None = None,
+        embed_fn: Callable[[str], Sequence[float]] | None = None,
     ) -> None:
         self._generate = generate_fn
         self._cache = cache or SchemaMappingCache()
+        # Optional embedding hook (e.g. the retriever's) enabling near-match
+        # reuse of mappings when source column lists drift slightly.
+        self._embed_fn = embed_fn
+        self._signature_embeddings: np.ndarray | None = None
+        self._signature_entries: list[tuple[str, Dict[str, str]]] = []
 
     def generate_mappings(
         self,
@@ -91,6 +240,7 @@ class SchemaMapper:
         namespace: str | None = None,
     ) -> Dict[str, Dict[str, str]]:
         mappings: Dict[str, Dict[str, str]] = {}
+        pending: list[tuple[str, list[str], list[str], str]] = []
         for table in tables:
             target_columns = catalog.get_columns(table)
             sources = None
@@ -98,20 +248,82 @@ class SchemaMapper:
                 sources = source_hints.get(table)
             if not sources:
                 sources = target_columns
-            try:
+            cache_key = self._build_cache_key(table, sources, target_columns, namespace)
+            cached = self._cache.get(cache_key)
+            if cached:
+                mappings[table] = cached
+                continue
+            pending.append((table, list(sources), list(target_columns), cache_key))
+
+        try:
+            if len(pending) == 1:
+                table, sources, targets, _ = pending[0]
                 mapping = self._generate_for_table(
                     table,
-                    source_columns=list(sources),
-                    target_columns=target_columns,
+                    source_columns=sources,
+                    target_columns=targets,
                     manifest=manifest,
                     namespace=namespace,
                 )
-            except SchemaMappingError as exc:
-                logger.warning("Schema mapping failed for table %s: %s", table, exc)
-                raise
-            if mapping:
-                mappings[table] = mapping
-        return mappings
+                if mapping:
+                    mappings[table] = mapping
+            elif pending:
+                mappings.update(
+                    self._generate_batch(pending, manifest=manifest, namespace=namespace)
+                )
+        except SchemaMappingError as exc:
+            logger.warning("Schema mapping failed: %s", exc)
+            raise
+        return {table: mappings[table] for table in tables if table in mappings}
+
+    def _generate_batch(
+        self,
+        pending: Sequence[tuple[str, list[str], list[str], str]],
+        *,
+        manifest: ETLManifest | None,
+        namespace: str | None,
+    ) -> Dict[str, Dict[str, str]]:
+        """Map all uncached tables in one LLM round trip per prompt chunk.
+
+        Tables missing from (or unparsable in) the batched reply fall back to
+        the per-table path, so a partial answer degrades to the old behaviour
+        instead of failing the run.
+        """
+        results: Dict[str, Dict[str, str]] = {}
+        for chunk in _chunk_specs(pending):
+            prompt = build_schema_mapping_batch_prompt(
+                [
+                    {
+                        "table_name": table,
+                        "source_columns": sources,
+                        "target_columns": targets,
+                        "manifest_transform": manifest.transform if manifest else None,
+                    }
+                    for table, sources, targets, _ in chunk
+                ]
+            )
+            per_table: Dict[str, object] | None
+            try:
+                per_table = self._parse_batch_response(self._generate(prompt))
+            except Exception as exc:
+                logger.warning("Batched schema mapping failed (%s); retrying per table", exc)
+                per_table = None
+            for table, sources, targets, cache_key in chunk:
+                columns = per_table.get(table) if per_table else None
+                if isinstance(columns, dict):
+                    mapping = self._coerce_mapping(columns, targets)
+                    self._cache.set(cache_key, mapping)
+                else:
+                    mapping = self._generate_for_table(
+                        table,
+                        source_columns=sources,
+                        target_columns=targets,
+                        manifest=manifest,
+                        namespace=namespace,
+                    )
+                if mapping:
+                    results[table] = mapping
+        return results
 
     def _generate_for_table(
         self,
@@ -127,6 +339,13 @@ class SchemaMapper:
         if cached:
             return cached
 
+        signature = self._signature_embedding(table, source_columns)
+        if signature is not None:
+            near_match = self._signature_lookup(table, signature, target_columns)
+            if near_match is not None:
+                self._cache.set(cache_key, near_match)
+                return near_match
+
         prompt = build_schema_mapping_prompt(
             table_name=table,
             source_columns=source_columns,
@@ -142,8 +361,51 @@ class SchemaMapper:
 
         mapping = self._parse_response(response, target_columns)
         self._cache.set(cache_key, mapping)
+        if signature is not None:
+            self._remember_signature(table, signature, mapping)
         return mapping
 
+    def _signature_embedding(self, table: str, source_columns: Sequence[str]) -> np.ndarray | None:
+        """Embed the (table, sorted source columns) signature, if enabled."""
+        if self._embed_fn is None:
+            return None
+        text = f"{table}\n" + "|".join(sorted(str(column) for column in source_columns))
+        try:
+            vector = np.asarray(self._embed_fn(text), dtype=np.float32).reshape(-1)
+        except Exception as exc:  # pragma: no cover - embedding proxy hiccups
+            logger.warning("Signature embedding failed; skipping semantic cache: %s", exc)
+            return None
+        norm = float(np.linalg.norm(vector))
+        if norm:
+            vector = vector / norm
+        return vector
+
+    def _signature_lookup(
+        self, table: str, embedding: np.ndarray, target_columns: Sequence[str]
+    ) -> Dict[str, str] | None:
+        """Reuse a previous mapping whose source signature is close enough."""
+        if self._signature_embeddings is None or not self._signature_entries:
+            return None
+        sims = self._signature_embeddings @ embedding
+        for idx in np.argsort(-sims):
+            if sims[idx] < _SIGNATURE_SIM_THRESHOLD:
+                break
+            cached_table, mapping = self._signature_entries[int(idx)]
+            if cached_table == table and all(column in mapping for column in target_columns):
+                return dict(mapping)
+        return None
+
+    def _remember_signature(self, table: str, embedding: np.ndarray, mapping: Dict[str, str]) -> None:
+        row = embedding.reshape(1, -1)
+        if self._signature_embeddings is None:
+            self._signature_embeddings = row
+        else:
+            self._signature_embeddings = np.vstack([self._signature_embeddings, row])
+        self._signature_entries.append((table, dict(mapping)))
+        if len(self._signature_entries) > _SIGNATURE_CACHE_SIZE:
+            self._signature_embeddings = self._signature_embeddings[1:]
+            self._signature_entries.pop(0)
+
     @staticmethod
     def _build_cache_key(
         table: str,
@@ -151,32 +413,23 @@ class SchemaMapper:
         target_columns: Sequence[str],
         namespace: str | None,
     ) -> str:
-        payload = json.dumps(
-            {
-                "table": table,
-                "source": sorted(str(column) for column in source_columns),
-                "target": list(target_columns),
-                "namespace": namespace or "default",
-            },
-            sort_keys=True,
+        return _cache_key_impl(
+            table,
+            tuple(sorted(str(column) for column in source_columns)),
+            tuple(target_columns),
+            namespace or "default",
         )
-        digest = hashlib.md5(payload.encode("utf-8")).hexdigest()
-        return f"{table}:{digest}"
 
     @staticmethod
     def _strip_code_fence(text: str) -> str:
-        cleaned = text.strip()
-        if cleaned.startswith("```") and cleaned.endswith("```"):
-            cleaned = cleaned[3:-3].strip()
-            if cleaned.lower().startswith("json"):
-                cleaned = cleaned[4:].strip()
-        return cleaned
+        match = _FENCE_RE.match(text)
+        return match.group(1) if match else text.strip()
 
     def _parse_response(self, payload: str, target_columns: Sequence[str]) -> Dict[str, str]:
         cleaned = self._strip_code_fence(payload)
         try:
-            data = json.loads(cleaned)
-        except json.JSONDecodeError as exc:
+            data = orjson.loads(cleaned)
+        except orjson.JSONDecodeError as exc:
             raise SchemaMappingError(f"LLM returned invalid JSON: {exc}") from exc
 
         if isinstance(data, dict) and isinstance(data.get("columns"), dict):
@@ -186,15 +439,39 @@ class SchemaMapper:
         else:
             raise SchemaMappingError("LLM response must be a JSON object with column mappings")
 
-        mapping: Dict[str, str] = {}
-        for column in target_columns:
-            raw_value = columns.get(column, columns.get(column.upper())) if isinstance(columns, dict) else None
-            if raw_value is None:
-                mapping[column] = column
-                continue
-            if not isinstance(raw_value, str) or not raw_value.strip():
-                mapping[column] = column
+        return self._coerce_mapping(columns, target_columns)
+
+    def _parse_batch_response(self, payload: str) -> Dict[str, object]:
+        """Parse a batched reply into a per-table column dict."""
+        cleaned = self._strip_code_fence(payload)
+        try:
+            data = orjson.loads(cleaned)
+        except orjson.JSONDecodeError as exc:
+            raise SchemaMappingError(f"LLM returned invalid JSON: {exc}") from exc
+        if not isinstance(data, dict):
+            raise SchemaMappingError("LLM batch response must be a JSON object keyed by table")
+        tables = data.get("tables")
+        if isinstance(tables, dict):
+            data = tables
+        return {str(key): value for key, value in data.items()}
+
+    @staticmethod
+    def _coerce_mapping(columns: Mapping[str, object], target_columns: Sequence[str]) -> Dict[str, str]:
+        # Single pass over the reply instead of two lookups per target column;
+        # exact-case keys take precedence over upper-cased ones, as before.
+        exact_keys, upper_map = _target_key_maps(tuple(target_columns))
+        resolved: Dict[str, str] = {}
+        exact: Dict[str, str] = {}
+        for key, value in columns.items():
+            cleaned_value = value.strip() if isinstance(value, str) else ""
+            if not cleaned_value:
                 continue
-            mapping[column] = raw_value.strip()
-        return mapping
+            if key in exact_keys:
+                exact[key] = cleaned_value
+            else:
+                canonical = upper_map.get(key)
+                if canonical is not None:
+                    resolved[canonical] = cleaned_value
+        resolved.update(exact)
+        return {column: resolved.get(column, column) for column in target_columns}
 
@@ -3,9 +3,14 @@
 
 from __future__ import annotations
 
+import asyncio
+import fnmatch
 import hashlib
-import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union, Sequence
 import uuid
@@ -13,39 +18,71 @@ import time
 import logging
 import re
 
+import msgspec
+import orjson
 from sqlalchemy.exc import SQLAlchemyError
 
+try:
+    from xxhash import xxh3_128_hexdigest as _digest_hex
+    from xxhash import xxh3_128 as _digest_stream
+except ImportError:  # pragma: no cover - xxhash ships in requirements
+    def _digest_hex(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def _digest_stream():
+        return hashlib.blake2b(digest_size=16)
+
 from app.agent.guardrails import GuardrailViolation, ensure_required_literals, ensure_safe_prompt
 from app.agent.llm import LambdaLLMClient, LLMError
 from app.agent.planner import Intent, plan_intent
-from app.agent.prompts import build_etl_prompt, build_sql_prompt, build_sql_repair_prompt
+from app.agent.prompts import (
+    RepairInputs,
+    build_etl_prompt,
+    build_sql_prompt,
+    build_sql_repair_prompt,
+    build_sql_repair_prompt_variants,
+)
 from app.agent.repair_knowledge import RepairKnowledge
-from app.agent.retriever import ChromaRetriever, RetrievalError
+from app.agent.retriever import RetrievalError, get_retriever
+from app.agent.cache import TTLCache
 from app.agent.sql_executor import execute_query
+from app.agent.sql_semantic_cache import SQLSemanticCache
 from app.agent.validator import ValidationError, summarize_exception, validate_result
 from app.agent.schema_mapper import SchemaMapper, SchemaMappingError
 from app.agent.intent_classifier import IntentClassifier
 from app.agent.conversation_store import (
+    MAX_TURNS_STORED,
     append_agent_turn,
     append_user_turn,
     get_history as conversation_history,
-    get_last_intent,
+    get_history_and_intent,
     set_last_intent,
 )
 from app.core.config import ETLSettings, get_settings
 from app.core.logging import get_logger, log_structured, reset_session_id, set_session_id
 from app.etl.db_loader import DBLoadError, LoadRequest, load_table_from_csv
 from app.etl.json_to_s3 import ETLError, get_schema_catalog, run_pipeline_all
-from app.etl.manifest import ETLManifest, resolve_etl_settings
+from app.etl.manifest import resolve_etl_settings
+from app.etl.source_digest import get_source_digest_cache
 from app.etl.schema_catalog import SchemaCatalog
 from app.core.cache import delete as cache_delete
-from app.core.cache import get_client, get_json, set_json
+from app.core.cache import (
+    apply_state_deltas,
+    get_client,
+    get_text,
+    get_value_list_and_set,
+    set_text,
+)
 from app.agent.sql_intent import same_intent
 
 logger = get_logger(__name__)
 
 _PREVIEW_LEN = 160
 
+# How long one worker may hold the cross-process ETL lock before losers
+# stop polling the cache and run the pipeline themselves.
+_ETL_LOCK_TTL_SECONDS = 30
+
 
 def _preview(text: str | None, n: int = _PREVIEW_LEN) -> str:
     if not text:
@@ -61,6 +98,89 @@ def _context_preview(chunks: Sequence[str], limit: int = 3) -> list[str]:
     return out
 
 
+_DIRECTIVE_FENCE_RE = re.compile(r"\A\s*```(?:json)?\s*(.*?)\s*(?:```\s*)?\Z", re.DOTALL | re.IGNORECASE)
+
+
+@lru_cache(maxsize=256)
+def _directive_table(payload: str) -> str:
+    """Parse an ETL directive payload down to its normalized table choice.
+
+    Memoized because retry attempts frequently replay the same directive;
+    repeat payloads skip the fence strip and JSON parse entirely.
+
+    Deliberately in-process: offloading to a process pool was measured as
+    a net loss here — the orjson parse is microseconds on a sub-kilobyte
+    payload, while pickling the arguments and result costs more than the
+    parse itself. Schema mapping likewise stays in-process because the
+    mapper closes over the LLM client, which cannot cross a process
+    boundary, and its runtime is dominated by the proxy round-trip.
+    """
+    match = _DIRECTIVE_FENCE_RE.match(payload)
+    cleaned = match.group(1) if match else payload.strip()
+    try:
+        data = orjson.loads(cleaned)
+    except orjson.JSONDecodeError as exc:
+        raise ValueError("ETL directive is not valid JSON") from exc
+    if not isinstance(data, dict) or "table" not in data:
+        raise ValueError("ETL directive must be a JSON object with a 'table' field")
+    return str(data["table"]).strip().lower()
+
+
+def _first_sql_statement(text: str) -> str:
+    """Trim an LLM reply to its first complete SQL statement.
+
+    Models occasionally append commentary or a second statement after the
+    terminating ``;``; both trip the single-statement guardrail and cost a
+    full repair round-trip (LLM call + failed execute). Scanning for the
+    first ``;`` outside string literals, quoted identifiers, and comments
+    lets the valid leading statement run immediately instead.
+    """
+    end = len(text)
+    i = 0
+    while i < end:
+        ch = text[i]
+        if ch == ";":
+            candidate = text[:i]
+            if text[i + 1 :].strip() and candidate.strip():
+                return candidate
+            return text
+        if ch == "'" or ch == '"':
+            quote = ch
+            i += 1
+            while i < end:
+                if text[i] == quote:
+                    if quote == "'" and i + 1 < end and text[i + 1] == "'":
+                        i += 2
+                        continue
+                    break
+                i += 1
+        elif ch == "-" and text[i : i + 2] == "--":
+            newline = text.find("\n", i)
+            i = end if newline < 0 else newline
+        elif ch == "/" and text[i : i + 2] == "/*":
+            close = text.find("*/", i + 2)
+            i = end if close < 0 else close + 1
+        i += 1
+    return text
+
+
+def _pick_repair_candidate(candidates: list[str], *, limit: int) -> str:
+    """Return the first speculative repair candidate that passes guardrails.
+
+    If none validate, the first candidate is returned so the usual error
+    handling reports its violation exactly as a single attempt would.
+    """
+    from app.agent.guardrails import validate_sql
+
+    for candidate in candidates:
+        try:
+            validate_sql(candidate, limit=limit)
+        except GuardrailViolation:
+            continue
+        return candidate
+    return candidates[0]
+
+
 def _where_preview(sql: str, n: int = 220) -> str | None:
     try:
         match = re.search(r"\bwhere\b(.+)", sql, flags=re.I | re.S)
@@ -123,21 +243,70 @@ class AgentService:
     def __init__(self) -> None:
         self._llm = LambdaLLMClient()
         self._intent_classifier = IntentClassifier()
-        self._retriever = ChromaRetriever()
+        self._retriever = get_retriever()
         self._max_retries = get_settings().agent_max_retries
         self._repair_knowledge = RepairKnowledge()
+        # Identical concurrent ETL prompts coalesce onto a single pipeline
+        # run; see _handle_etl.
+        self._etl_inflight: dict[str, Future[ETLAgentResponse]] = {}
+        self._etl_inflight_lock = threading.Lock()
+        # Paraphrased SQL prompts reuse previously validated SQL; see
+        # _handle_sql. The exact-prompt TTL cache sits in front of the
+        # embedding layer for byte-identical repeats.
+        self._sql_semantic_cache = SQLSemanticCache()
+        self._sql_exact_cache = TTLCache(maxsize=512, ttl=3600.0)
+        # Accepted ETL directives keyed on (prompt, error history); the
+        # directive vocabulary is a handful of tiny JSON payloads, so repeat
+        # requests resolve the table choice without building a prompt or
+        # touching the LLM at all.
+        self._etl_directive_cache = TTLCache(maxsize=128, ttl=3600.0)
+        # Last retrieved context per session, reused for follow-up prompts
+        # whose vocabulary the stored chunks already cover (see
+        # _reusable_session_context).
+        self._session_context = TTLCache(maxsize=256, ttl=3600.0)
+        # Establish the proxy TLS connection and open the vector store off
+        # the critical path of the first query.
+        threading.Thread(target=self._warm_clients, name="agent-warmup", daemon=True).start()
+
+    def _warm_clients(self) -> None:
+        for dependency in (self._llm, self._retriever):
+            warmup = getattr(dependency, "warmup", None)
+            if warmup is None:
+                continue
+            try:
+                warmup()
+            except Exception:  # pragma: no cover - warm-up is best-effort
+                logger.debug("Warm-up failed for %r", dependency, exc_info=True)
 
     def handle_query(
         self,
         prompt: str,
         *,
         session_id: str | None = None,
+    ) -> Tuple[AgentResult, str, List[Dict[str, Any]]]:
+        """Synchronous shim over :meth:`ahandle_query` for non-async callers."""
+        return asyncio.run(self.ahandle_query(prompt, session_id=session_id))
+
+    async def ahandle_query(
+        self,
+        prompt: str,
+        *,
+        session_id: str | None = None,
     ) -> Tuple[AgentResult, str, List[Dict[str, Any]]]:
         ensure_safe_prompt(prompt)
 
         active_session = session_id or str(uuid.uuid4())
-        history = conversation_history(active_session)
-        classified_intent, reuse_last = self._classify_intent(prompt, history, active_session)
+        # Follow-up prompts whose vocabulary the previous turn's context
+        # already covers skip retrieval outright; otherwise retrieval runs
+        # speculatively so the embedding + vector-store round-trip can
+        # overlap history fetch and intent classification. The task is
+        # cancelled if routing lands on an unsupported intent.
+        reused_context = self._reusable_session_context(active_session, prompt)
+        retrieval_task = (
+            asyncio.create_task(self._aretrieve_context(prompt)) if reused_context is None else None
+        )
+        history, last_intent_name = await asyncio.to_thread(get_history_and_intent, active_session)
+        classified_intent, reuse_last = await self._aclassify_intent(prompt, history, active_session)
         start_time = time.perf_counter()
         log_structured(
             logger,
@@ -148,71 +317,104 @@ class AgentService:
             history_turns=len(history),
         )
 
+        # Single dict lookup instead of repeated __members__ membership tests.
+        last_intent = Intent.__members__.get(last_intent_name)
         if reuse_last:
-            last_intent_name = get_last_intent(active_session)
-            active_intent = Intent[last_intent_name] if last_intent_name in Intent.__members__ else Intent.SQL
+            active_intent = last_intent or Intent.SQL
         elif classified_intent is not None:
             active_intent = classified_intent
+        elif last_intent is not None:
+            active_intent = last_intent
         else:
-            last_intent_name = get_last_intent(active_session)
-            if last_intent_name in Intent.__members__:
-                active_intent = Intent[last_intent_name]
-            else:
-                active_intent = plan_intent(prompt).intent
+            active_intent = plan_intent(prompt).intent
 
         session_token = set_session_id(active_session)
         try:
-            append_user_turn(active_session, prompt)
-            etl_settings_preview = {}
-            if active_intent is Intent.ETL:
-                etl_cfg = get_settings().etl
-                etl_settings_preview = {
-                    "raw_dir": getattr(etl_cfg, "raw_dir", ""),
-                    "processed_dir": getattr(etl_cfg, "processed_dir", ""),
-                    "manifest": getattr(etl_cfg, "manifest_path", ""),
-                }
-            log_structured(
-                logger,
-                logging.INFO,
-                "agent_routing",
-                classified_intent=getattr(classified_intent, "name", None),
-                reuse_last=reuse_last,
-                final_intent=active_intent.name,
-                etl_settings=etl_settings_preview,
-            )
-            prompt_history = history + [{"role": "user", "prompt": prompt}]
-
-            if active_intent is Intent.SQL:
-                response = self._handle_sql(prompt, history=prompt_history, session_id=active_session)
-            elif active_intent is Intent.ETL:
-                response = self._handle_etl(prompt, history=prompt_history, session_id=active_session)
+            user_turn = await asyncio.to_thread(append_user_turn, active_session, prompt)
+            if logger.isEnabledFor(logging.INFO):
+                etl_settings_preview = {}
+                if active_intent is Intent.ETL:
+                    etl_cfg = get_settings().etl
+                    etl_settings_preview = {
+                        "raw_dir": getattr(etl_cfg, "raw_dir", ""),
+                        "processed_dir": getattr(etl_cfg, "processed_dir", ""),
+                        "manifest": getattr(etl_cfg, "manifest_path", ""),
+                    }
+                log_structured(
+                    logger,
+                    logging.INFO,
+                    "agent_routing",
+                    classified_intent=getattr(classified_intent, "name", None),
+                    reuse_last=reuse_last,
+                    final_intent=active_intent.name,
+                    etl_settings=etl_settings_preview,
+                )
+            prompt_history = history + [user_turn or {"role": "user", "prompt": prompt}]
+
+            # The handlers are blocking (DB, Chroma, sync LLM paths); running
+            # them in a worker thread keeps the event loop free to serve
+            # other requests. Context vars (session id) propagate into the
+            # thread.
+            if active_intent in (Intent.SQL, Intent.ETL):
+                if retrieval_task is None:
+                    context = reused_context
+                else:
+                    try:
+                        context = await retrieval_task
+                    except RetrievalError:
+                        # Let the handler issue its own retrieval so failure
+                        # logging and guardrail precedence stay unchanged.
+                        context = None
+                if active_intent is Intent.SQL:
+                    response = await asyncio.to_thread(
+                        self._handle_sql, prompt, history=prompt_history, session_id=active_session, context=context
+                    )
+                else:
+                    response = await asyncio.to_thread(
+                        self._handle_etl, prompt, history=prompt_history, session_id=active_session, context=context
+                    )
             else:
                 raise NotImplementedError(f"Intent {active_intent.name} not yet supported")
         finally:
             reset_session_id(session_token)
+            if retrieval_task is not None and not retrieval_task.done():
+                retrieval_task.cancel()
+
+        if response.context:
+            self._session_context.put(active_session, list(response.context))
 
-        self._record_agent_turn(active_session, active_intent, response)
-        set_last_intent(active_session, active_intent.name)
+        # Independent bookkeeping writes overlap in one gather.
+        agent_turn, _ = await asyncio.gather(
+            asyncio.to_thread(self._record_agent_turn, active_session, active_intent, response),
+            asyncio.to_thread(set_last_intent, active_session, active_intent.name),
+        )
         elapsed = time.perf_counter() - start_time
-        if isinstance(response, SQLAgentResponse):
-            metrics = {
-                "row_count": len(response.rows),
-                "column_count": len(response.columns),
-                "repaired": response.repaired,
-            }
+        if logger.isEnabledFor(logging.INFO):
+            if isinstance(response, SQLAgentResponse):
+                metrics = {
+                    "row_count": len(response.rows),
+                    "column_count": len(response.columns),
+                    "repaired": response.repaired,
+                }
+            else:
+                metrics = {
+                    "table_count": len(response.results),
+                    "tables": [
+                        {"table": summary.table, "row_count": summary.row_count}
+                        for summary in response.results
+                    ],
+                    "repaired": response.repaired,
+                }
+            metrics.update({"attempts": response.attempts, "elapsed_ms": round(elapsed * 1000, 2), "intent": response.intent.name})
+            log_structured(logger, logging.INFO, "agent_handle_query_complete", **metrics)
+
+        # The appended turns are already in hand, so the updated history is
+        # assembled locally instead of re-reading the session document. The
+        # reload remains as a fallback for stores that do not echo the turn.
+        if agent_turn is not None:
+            updated_history = (prompt_history + [agent_turn])[-MAX_TURNS_STORED:]
         else:
-            metrics = {
-                "table_count": len(response.results),
-                "tables": [
-                    {"table": summary.table, "row_count": summary.row_count}
-                    for summary in response.results
-                ],
-                "repaired": response.repaired,
-            }
-        metrics.update({"attempts": response.attempts, "elapsed_ms": round(elapsed * 1000, 2), "intent": response.intent.name})
-        log_structured(logger, logging.INFO, "agent_handle_query_complete", **metrics)
-
-        updated_history = conversation_history(active_session)
+            updated_history = await asyncio.to_thread(conversation_history, active_session)
         return response, active_session, updated_history
 
     # ------------------------------------------------------------------
@@ -224,6 +426,7 @@ class AgentService:
         *,
         history: List[Dict[str, Any]],
         session_id: str,
+        context: List[str] | None = None,
     ) -> SQLAgentResponse:
         settings = get_settings()
         try:
@@ -239,7 +442,8 @@ class AgentService:
                     error=str(exc),
                 )
                 raise
-            context = self._retriever.retrieve(prompt)
+            if context is None:
+                context = self._retriever.retrieve(prompt)
         except RetrievalError as exc:
             log_structured(
                 logger,
@@ -259,6 +463,12 @@ class AgentService:
         )
 
         limit = settings.default_result_limit
+        # Settings consulted on every attempt are bound to locals once; the
+        # retry loop then avoids repeated getattr traversals per iteration.
+        log_sql_text = getattr(settings, "log_sql_text", False)
+        empty_min_attempts = getattr(settings, "empty_result_min_attempts", 2)
+        empty_stability_enabled = getattr(settings, "empty_result_stability_enabled", True)
+        compare_via_llm = getattr(settings, "sql_semantic_compare_via_llm", False)
         error_messages: list[str] = []
         last_sql: str | None = None
         required_literals = _extract_required_literals(prompt)
@@ -283,18 +493,87 @@ class AgentService:
         except Exception:
             guidance = None
 
+        # Stripped once here rather than inside every repair iteration.
+        stripped_prompt = augmented_prompt.strip()
+
+        # Two cache layers sit in front of generation. The exact-prompt TTL
+        # cache catches byte-identical repeats with one digest and no
+        # embedding; the semantic layer then catches paraphrases. Reused SQL
+        # always re-passes the literal guard, executes, and validates, so a
+        # stale hit degrades to the normal generation path.
+        def _cached_response(result: dict, cache_kind: str) -> SQLAgentResponse:
+            log_structured(
+                logger,
+                logging.INFO,
+                f"sql_{cache_kind}_cache_hit",
+                row_count=len(result["rows"]),
+            )
+            return SQLAgentResponse(
+                sql=result["sql"],
+                rows=result["rows"],
+                columns=result["columns"],
+                intent=Intent.SQL,
+                limit_enforced=result["limit_enforced"],
+                attempts=1,
+                repaired=False,
+                errors=[],
+                context=list(context),
+            )
+
+        cache_enabled = getattr(settings, "sql_semantic_cache_enabled", True)
+        prompt_embedding = None
+        schema_hash = None
+        exact_key = None
+        if cache_enabled:
+            schema_hash = _schema_version_hash()
+        if schema_hash is not None:
+            exact_key = _digest_hex(
+                f"{stripped_prompt.lower()}|{schema_hash}|{limit}".encode("utf-8")
+            )
+            cached_sql = self._sql_exact_cache.get(exact_key)
+            if cached_sql:
+                result = self._execute_cached_sql(cached_sql, required_literals)
+                if result is not None:
+                    log_structured(
+                        logger,
+                        logging.INFO,
+                        "sql_exact_cache_stats",
+                        hits=self._sql_exact_cache.hits,
+                        misses=self._sql_exact_cache.misses,
+                    )
+                    return _cached_response(result, "exact")
+            # The embedding is free for history-less prompts (the retrieval
+            # path already cached it).
+            try:
+                prompt_embedding = self._retriever.embed(augmented_prompt)
+            except Exception:  # pragma: no cover - cache is best-effort
+                prompt_embedding = None
+            if prompt_embedding is not None:
+                cached_sql = self._sql_semantic_cache.get(prompt_embedding, schema_hash=schema_hash)
+                if cached_sql:
+                    result = self._execute_cached_sql(cached_sql, required_literals)
+                    if result is not None:
+                        return _cached_response(result, "semantic")
+
         for attempt in range(1, self._max_retries + 1):
             if attempt == 1 or last_sql is None or not error_messages:
-                sql_prompt = build_sql_prompt(augmented_prompt, context, limit=limit, guidance=guidance)
+                sql_prompts = [build_sql_prompt(augmented_prompt, context, limit=limit, guidance=guidance)]
             else:
-                sql_prompt = build_sql_repair_prompt(
-                    user_prompt=augmented_prompt,
-                    context_chunks=context,
-                    previous_sql=last_sql,
-                    error_summary=error_messages[-1],
-                    limit=limit,
-                    guidance=guidance,
+                repair_inputs = RepairInputs(
+                    user_prompt=stripped_prompt,
+                    previous_sql=last_sql.strip(),
+                    error_summary=error_messages[-1].strip(),
                 )
+                if len(error_messages) >= 2 and hasattr(self._llm, "generate_many"):
+                    # Failure-prone query: speculatively race two differently
+                    # hinted repairs and keep the first that validates.
+                    sql_prompts = build_sql_repair_prompt_variants(
+                        repair_inputs, context, limit=limit, guidance=guidance
+                    )
+                else:
+                    sql_prompts = [
+                        build_sql_repair_prompt(repair_inputs, context, limit=limit, guidance=guidance)
+                    ]
 
             log_structured(
                 logger,
@@ -305,7 +584,13 @@ class AgentService:
             )
 
             try:
-                sql = self._llm.generate(sql_prompt)
+                if len(sql_prompts) == 1:
+                    sql = _first_sql_statement(self._llm.generate(sql_prompts[0]))
+                else:
+                    sql = _pick_repair_candidate(
+                        [_first_sql_statement(candidate) for candidate in self._llm.generate_many(sql_prompts)],
+                        limit=limit,
+                    )
                 if required_literals:
                     ensure_required_literals(sql, required_literals)
                 # log generated SQL (preview by default)
@@ -315,7 +600,7 @@ class AgentService:
                     "sql_generated",
                     attempt=attempt,
                     repair=attempt > 1,
-                    sql_preview=sql if getattr(settings, "log_sql_text", False) else _preview(sql, 400),
+                    sql_preview=sql if log_sql_text else _preview(sql, 400),
                 )
             except (LLMError, GuardrailViolation) as exc:
                 summary = summarize_exception(exc)
@@ -343,7 +628,6 @@ class AgentService:
                 if not result["rows"]:
                     # Count how many previous attempts were semantically equivalent
                     matches = 1
-                    settings = get_settings()
                     # Compare with all previous attempts for semantic equivalence
                     for prev_sql in attempt_sqls[:-1]:
                         try:
@@ -353,8 +637,8 @@ class AgentService:
                             continue
                     # Optional LLM judge for semantic sameness if configured
                     if (
-                        matches < getattr(settings, "empty_result_min_attempts", 2)
-                        and getattr(settings, "sql_semantic_compare_via_llm", False)
+                        matches < empty_min_attempts
+                        and compare_via_llm
                         and len(attempt_sqls) >= 2
                     ):
                         judge_prompt = (
@@ -365,7 +649,7 @@ class AgentService:
                         try:
                             verdict = self._llm.generate(judge_prompt).strip().upper()
                             if verdict.startswith("YES"):
-                                matches = max(matches, getattr(settings, "empty_result_min_attempts", 2))
+                                matches = max(matches, empty_min_attempts)
                         except Exception:
                             pass
                     log_structured(
@@ -374,13 +658,13 @@ class AgentService:
                         "sql_no_results_attempt",
                         attempt=attempt,
                         intent_stable_matches=matches,
-                        min_required=getattr(settings, "empty_result_min_attempts", 2),
+                        min_required=empty_min_attempts,
                         where_preview=_where_preview(sql),
                     )
                     if (
-                        getattr(settings, "empty_result_stability_enabled", True)
-                        and matches >= getattr(settings, "empty_result_min_attempts", 2)
-                        and attempt >= getattr(settings, "empty_result_min_attempts", 2)
+                        empty_stability_enabled
+                        and matches >= empty_min_attempts
+                        and attempt >= empty_min_attempts
                     ):
                         log_structured(
                             logger,
@@ -411,8 +695,14 @@ class AgentService:
                     attempt=attempt,
                     row_count=len(result["rows"]),
                     column_count=len(result["columns"]),
-                    sql_preview=result["sql"] if getattr(settings, "log_sql_text", False) else _preview(result["sql"], 400),
+                    sql_preview=result["sql"] if log_sql_text else _preview(result["sql"], 400),
                 )
+                if exact_key is not None:
+                    self._sql_exact_cache.put(exact_key, result["sql"])
+                if prompt_embedding is not None and schema_hash is not None:
+                    self._sql_semantic_cache.put(
+                        prompt_embedding, result["sql"], schema_hash=schema_hash
+                    )
                 return SQLAgentResponse(
                     sql=result["sql"],
                     rows=result["rows"],
@@ -461,7 +751,114 @@ class AgentService:
     # ------------------------------------------------------------------
     # ETL path
     # ------------------------------------------------------------------
-    def _handle_etl(self, prompt: str, *, history: List[Dict[str, Any]], session_id: str) -> ETLAgentResponse:
+    def _handle_etl(
+        self,
+        prompt: str,
+        *,
+        history: List[Dict[str, Any]],
+        session_id: str,
+        context: List[str] | None = None,
+    ) -> ETLAgentResponse:
+        """Coalesce identical concurrent ETL prompts onto a single run.
+
+        The pipeline (LLM directive + extract + load) is by far the most
+        expensive operation served here, so a burst of duplicate prompts
+        must not fan out into duplicate runs. Within the process, the
+        first caller for a cache key becomes the leader and everyone else
+        waits on its future. Across processes, the leader takes a short
+        ``SET NX EX`` lock in Redis; losers poll the response cache with
+        exponential backoff and only run the pipeline themselves if the
+        lock expires without a cached result appearing.
+        """
+        cache_client = get_client()
+        if not cache_client:
+            return self._run_etl(prompt, history=history, session_id=session_id, context=context)
+        etl_settings, _ = resolve_etl_settings(get_settings().etl)
+        cache_key = self._make_etl_cache_key(prompt, etl_settings)
+
+        with self._etl_inflight_lock:
+            existing = self._etl_inflight.get(cache_key)
+            if existing is None:
+                future: Future[ETLAgentResponse] = Future()
+                self._etl_inflight[cache_key] = future
+        if existing is not None:
+            log_structured(logger, logging.INFO, "etl_inflight_join", cache_key=cache_key)
+            return existing.result()
+
+        lock_key = f"{cache_key}:lock"
+        lock_token = str(uuid.uuid4())
+        lock_held = False
+        try:
+            try:
+                lock_held = bool(
+                    cache_client.set(lock_key, lock_token, nx=True, ex=_ETL_LOCK_TTL_SECONDS)
+                )
+            except Exception as exc:  # pragma: no cover - Redis down; run uncoordinated
+                logger.warning("ETL lock acquire failed for key %s: %s", lock_key, exc)
+            if not lock_held:
+                payload = self._poll_etl_cache(cache_key)
+                response = (
+                    _cached_response_to_etl_agent_response(payload) if payload is not None else None
+                )
+                if response is not None:
+                    log_structured(logger, logging.INFO, "etl_lock_wait_hit", cache_key=cache_key)
+                else:
+                    response = self._run_etl(
+                        prompt, history=history, session_id=session_id, context=context
+                    )
+            else:
+                response = self._run_etl(
+                    prompt, history=history, session_id=session_id, context=context
+                )
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            with self._etl_inflight_lock:
+                self._etl_inflight.pop(cache_key, None)
+            if lock_held:
+                self._release_etl_lock(lock_key, lock_token)
+
+    @staticmethod
+    def _poll_etl_cache(cache_key: str, timeout: float = _ETL_LOCK_TTL_SECONDS) -> Any | None:
+        """Wait for another worker's cached ETL response, backing off exponentially."""
+        deadline = time.monotonic() + timeout
+        delay = 0.1
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(delay, remaining))
+            payload = get_text(cache_key)
+            if payload is not None:
+                return payload
+            delay = min(delay * 2, 2.0)
+
+    @staticmethod
+    def _release_etl_lock(lock_key: str, lock_token: str) -> None:
+        # GET-then-DEL is not atomic, but the lock is advisory: the worst
+        # case is one redundant pipeline run, never a wrong result.
+        client = get_client()
+        if not client:
+            return
+        try:
+            holder = client.get(lock_key)
+            if holder == lock_token:
+                client.delete(lock_key)
+        except Exception as exc:  # pragma: no cover
+            logger.warning("ETL lock release failed for key %s: %s", lock_key, exc)
+
+    def _run_etl(
+        self,
+        prompt: str,
+        *,
+        history: List[Dict[str, Any]],
+        session_id: str,
+        context: List[str] | None = None,
+    ) -> ETLAgentResponse:
         settings = get_settings()
         etl_settings, manifest = resolve_etl_settings(settings.etl)
         catalog = get_schema_catalog(etl_settings)
@@ -489,7 +886,8 @@ class AgentService:
                     if isinstance(value, (list, tuple, set))
                 }
         try:
-            context = self._retriever.retrieve(prompt)
+            if context is None:
+                context = self._retriever.retrieve(prompt)
         except RetrievalError as exc:
             log_structured(
                 logger,
@@ -515,90 +913,166 @@ class AgentService:
         skip_tables: set[str] = set()
         if cache_client:
             cache_key = self._make_etl_cache_key(prompt, etl_settings)
-            cached_payload = get_json(cache_key)
-            if cached_payload:
-                log_structured(logger, logging.INFO, "etl_cache_hit", cache_key=cache_key)
-                return _cached_response_to_etl_agent_response(cached_payload)
             error_history_key = f"{cache_key}:errors"
-            cached_errors = get_json(error_history_key)
-            if isinstance(cached_errors, list):
-                error_history = [str(item) for item in cached_errors]
             skip_flag_key = f"{cache_key}:skip_tables"
-            cached_skips = get_json(skip_flag_key)
-            if isinstance(cached_skips, list):
-                skip_tables = {str(item) for item in cached_skips}
-
-        for attempt in range(1, self._max_retries + 1):
-            etl_prompt = build_etl_prompt(
-                augmented_prompt,
-                context,
-                error_history=error_history,
+            cached_payload, cached_errors, cached_skips = get_value_list_and_set(
+                cache_key, error_history_key, skip_flag_key
             )
-            log_structured(
-                logger,
-                logging.INFO,
-                "etl_directive_attempt",
-                attempt=attempt,
+            if cached_payload:
+                cached_response = _cached_response_to_etl_agent_response(cached_payload)
+                if cached_response is not None:
+                    log_structured(logger, logging.INFO, "etl_cache_hit", cache_key=cache_key)
+                    return cached_response
+            error_history = [str(item) for item in cached_errors]
+            skip_tables = {str(item) for item in cached_skips}
+
+        # Invariant across retry attempts: the ordered catalog and the
+        # manifest's conflict preference never change within one call.
+        all_tables_ordered = list(_order_tables_cached(tuple(catalog.table_names)))
+        # Settings consulted on every attempt (and inside the load-worker
+        # closures) are bound to locals once, outside the retry loop.
+        enable_db_load = etl_settings.enable_db_load
+        truncate_before_load = etl_settings.truncate_before_load
+        db_chunksize = etl_settings.db_chunksize
+        database_settings = settings.database
+        prefer_upsert = False
+        if manifest:
+            conflict_strategy = manifest.target.get("on_conflict")
+            if isinstance(conflict_strategy, str) and conflict_strategy.lower() in {"upsert", "do_nothing"}:
+                prefer_upsert = True
+
+        # Error-history / skip-table writes are deferred and delta-based: the
+        # loop body records only what changed and _flush_cache_state pushes the
+        # deltas (RPUSH / SADD / SREM) once per attempt, so write cost tracks
+        # the number of new events rather than the accumulated state size.
+        pending_errors: list[str] = []
+        skips_added: set[str] = set()
+        skips_removed: set[str] = set()
+
+        def _record_error(message: str) -> None:
+            error_history.append(message)
+            pending_errors.append(message)
+
+        def _skip_table(table: str) -> None:
+            skip_tables.add(table)
+            skips_added.add(table)
+            skips_removed.discard(table)
+
+        def _unskip_table(table: str) -> None:
+            skip_tables.discard(table)
+            skips_removed.add(table)
+            skips_added.discard(table)
+
+        def _flush_cache_state() -> None:
+            if not (pending_errors or skips_added or skips_removed):
+                return
+            apply_state_deltas(
+                list_key=error_history_key,
+                list_items=list(pending_errors),
+                set_key=skip_flag_key,
+                add=set(skips_added),
+                remove=set(skips_removed),
+                ttl=cache_ttl,
+                max_items=100,
             )
+            pending_errors.clear()
+            skips_added.clear()
+            skips_removed.clear()
+
+        # "Run everything" style prompts need no directive at all: the loop
+        # below forces table_choice to "all" regardless of what the LLM
+        # returns, so a prompt that already asks for the full pipeline can
+        # skip the round trip outright.
+        trivial_directive = _TRIVIAL_ETL_RE.search(prompt) is not None
+        if trivial_directive:
+            log_structured(logger, logging.INFO, "etl_directive_trivial", table="all")
 
-            try:
-                directive_raw = self._llm.generate(etl_prompt)
-                directive = self._parse_etl_directive(
-                    directive_raw,
-                    etl_settings=etl_settings,
-                    catalog=catalog,
-                )
-                table_choice = directive["table"]
-                if table_choice != "all":
+        for attempt in range(1, self._max_retries + 1):
+            if trivial_directive:
+                table_choice = "all"
+                directive_key = None
+            else:
+                # A previously accepted directive for the same (prompt, error
+                # history) pair skips prompt assembly and the LLM round trip.
+                directive_key = _digest_hex("\x00".join([augmented_prompt, *error_history]).encode("utf-8"))
+                table_choice = self._etl_directive_cache.get(directive_key)
+                if table_choice is not None:
                     log_structured(
                         logger,
                         logging.INFO,
-                        "etl_directive_override",
+                        "etl_directive_memo_hit",
                         attempt=attempt,
                         table=table_choice,
                     )
-                    table_choice = "all"
-            except (LLMError, GuardrailViolation) as exc:
-                summary = summarize_exception(exc)
-                error_history.append(f"Attempt {attempt} directive failed: {summary.message}")
-                if error_history_key:
-                    set_json(error_history_key, error_history, ttl=cache_ttl)
-                log_structured(
-                    logger,
-                    logging.WARNING,
-                    "etl_directive_error",
-                    attempt=attempt,
-                    error=summary.message,
+            if table_choice is None:
+                etl_prompt = build_etl_prompt(
+                    augmented_prompt,
+                    context,
+                    error_history=error_history,
                 )
-                if attempt == self._max_retries:
-                    raise AgentExecutionError(summary.message, attempts=attempt, errors=list(error_history))
-                continue
-            except ValueError as exc:
-                summary = summarize_exception(exc)
-                error_history.append(f"Attempt {attempt} directive invalid: {summary.message}")
-                if error_history_key:
-                    set_json(error_history_key, error_history, ttl=cache_ttl)
                 log_structured(
                     logger,
-                    logging.WARNING,
-                    "etl_directive_invalid",
+                    logging.INFO,
+                    "etl_directive_attempt",
                     attempt=attempt,
-                    error=summary.message,
                 )
-                if attempt == self._max_retries:
-                    raise AgentExecutionError(summary.message, attempts=attempt, errors=list(error_history))
-                continue
+
+                try:
+                    directive_raw = self._llm.generate(etl_prompt)
+                    directive = self._parse_etl_directive(
+                        directive_raw,
+                        etl_settings=etl_settings,
+                        catalog=catalog,
+                    )
+                    table_choice = directive["table"]
+                    if table_choice != "all":
+                        log_structured(
+                            logger,
+                            logging.INFO,
+                            "etl_directive_override",
+                            attempt=attempt,
+                            table=table_choice,
+                        )
+                        table_choice = "all"
+                    self._etl_directive_cache.put(directive_key, table_choice)
+                except (LLMError, GuardrailViolation) as exc:
+                    summary = summarize_exception(exc)
+                    _record_error(f"Attempt {attempt} directive failed: {summary.message}")
+                    log_structured(
+                        logger,
+                        logging.WARNING,
+                        "etl_directive_error",
+                        attempt=attempt,
+                        error=summary.message,
+                    )
+                    _flush_cache_state()
+                    if attempt == self._max_retries:
+                        raise AgentExecutionError(summary.message, attempts=attempt, errors=list(error_history))
+                    continue
+                except ValueError as exc:
+                    summary = summarize_exception(exc)
+                    _record_error(f"Attempt {attempt} directive invalid: {summary.message}")
+                    log_structured(
+                        logger,
+                        logging.WARNING,
+                        "etl_directive_invalid",
+                        attempt=attempt,
+                        error=summary.message,
+                    )
+                    _flush_cache_state()
+                    if attempt == self._max_retries:
+                        raise AgentExecutionError(summary.message, attempts=attempt, errors=list(error_history))
+                    continue
 
             try:
-                requested_tables = (
-                    _order_tables(list(catalog.table_names))
-                    if table_choice == "all"
-                    else _order_tables([table_choice])
-                )
+                requested_tables = all_tables_ordered if table_choice == "all" else [table_choice]
 
                 column_mappings: dict[str, dict[str, str]] | None = None
                 if manifest and auto_mapping_enabled:
-                    mapper = SchemaMapper(generate_fn=self._llm.generate)
+                    mapper = SchemaMapper(
+                        generate_fn=self._llm.generate,
+                        embed_fn=getattr(self._retriever, "embed", None),
+                    )
                     try:
                         column_mappings = mapper.generate_mappings(
                             requested_tables,
@@ -611,15 +1085,16 @@ class AgentService:
                         message = f"Schema mapping failed: {exc}"
                         log_structured(logger, logging.WARNING, "schema_mapping_failed", error=message)
                         if message not in error_history:
-                            error_history.append(message)
-                            if error_history_key:
-                                set_json(error_history_key, error_history, ttl=cache_ttl)
+                            _record_error(message)
                         column_mappings = None
 
+                # The in-memory dataframes feed the DB load directly; the
+                # audit CSVs land on disk off the critical path.
                 pipeline_results = run_pipeline_all(
                     etl_settings,
                     manifest=manifest,
                     column_mappings=column_mappings,
+                    defer_local_write=True,
                 )
                 log_structured(
                     logger,
@@ -629,131 +1104,143 @@ class AgentService:
                     tables=list(pipeline_results),
                 )
                 if table_choice == "all":
-                    tables = _order_tables(list(pipeline_results))
+                    tables = list(_order_tables_cached(tuple(pipeline_results)))
                 else:
-                    tables = _order_tables([table_choice])
+                    tables = [table_choice]
                 db_rows: dict[str, int | None] = {}
-                if etl_settings.enable_db_load:
+                if enable_db_load:
                     load_failure_summary = None
-                    prefer_upsert = False
-                    if manifest:
-                        conflict_strategy = manifest.target.get("on_conflict")
-                        if isinstance(conflict_strategy, str) and conflict_strategy.lower() in {"upsert", "do_nothing"}:
-                            prefer_upsert = True
-                    for table in tables:
-                        stored_strategy = self._repair_knowledge.get_strategy(table)
-                        load_mode = stored_strategy or ("upsert" if prefer_upsert else "insert")
-                        if table in skip_tables and load_mode == "upsert":
-                            skip_tables.discard(table)
-                            if skip_flag_key:
-                                set_json(skip_flag_key, sorted(skip_tables), ttl=cache_ttl)
-
-                        if table in skip_tables:
+                    state_lock = threading.Lock()
+                    # One batched lookup before the loop instead of a
+                    # per-table call from inside the worker threads.
+                    stored_strategies = self._repair_knowledge.get_strategies(tables)
+
+                    def _load_one(table: str) -> Any | None:
+                        """Load one table; return a failure summary or None."""
+                        load_mode = stored_strategies.get(table) or ("upsert" if prefer_upsert else "insert")
+                        with state_lock:
+                            if table in skip_tables and load_mode == "upsert":
+                                _unskip_table(table)
+                            skip_now = table in skip_tables
+                            if skip_now:
+                                info_msg = f"DB load skipped for {table} (duplicate primary key detected earlier)."
+                                if info_msg not in error_history:
+                                    _record_error(info_msg)
+                                db_rows[table] = None
+                        if skip_now:
                             log_structured(
                                 logger,
                                 logging.INFO,
                                 "etl_db_load_skipped",
                                 table=table,
                             )
-                            info_msg = f"DB load skipped for {table} (duplicate primary key detected earlier)."
-                            if info_msg not in error_history:
-                                error_history.append(info_msg)
-                                if error_history_key:
-                                    set_json(error_history_key, error_history, ttl=cache_ttl)
-                            db_rows[table] = None
-                            continue
+                            return None
                         request = LoadRequest(
                             table=table,
                             csv_path=Path(pipeline_results[table]["local_path"]),
-                            truncate_before_load=etl_settings.truncate_before_load,
+                            truncate_before_load=truncate_before_load,
                             mode=load_mode,
+                            dataframe=pipeline_results[table].get("dataframe"),
                         )
                         try:
                             result = load_table_from_csv(
                                 request,
-                                database=settings.database,
-                                chunksize=etl_settings.db_chunksize,
+                                database=database_settings,
+                                chunksize=db_chunksize,
                             )
+                        except DBLoadError as exc:
+                            return _load_failed(table, load_mode, exc)
+                        with state_lock:
                             db_rows[result.table] = result.inserted_rows
                             if load_mode == "upsert":
                                 self._repair_knowledge.record_strategy(table, "upsert", error=None)
-                                if skip_flag_key and table in skip_tables:
-                                    skip_tables.discard(table)
-                                    set_json(skip_flag_key, sorted(skip_tables), ttl=cache_ttl)
-                        except DBLoadError as exc:
-                            message_lower = str(exc).lower()
-                            duplicate_error = (
-                                "duplicate key value violates unique constraint" in message_lower
-                                or "unique constraint failed" in message_lower
-                                or "unique constraint" in message_lower
+                                if table in skip_tables:
+                                    _unskip_table(table)
+                        return None
+
+                    def _load_failed(table: str, load_mode: str, exc: DBLoadError) -> Any | None:
+                        message_lower = str(exc).lower()
+                        duplicate_error = (
+                            "duplicate key value violates unique constraint" in message_lower
+                            or "unique constraint failed" in message_lower
+                            or "unique constraint" in message_lower
+                        )
+                        if duplicate_error and load_mode == "insert":
+                            log_structured(
+                                logger,
+                                logging.INFO,
+                                "etl_db_duplicate_key_retry",
+                                table=table,
                             )
-                            if duplicate_error and load_mode == "insert":
-                                log_structured(
-                                    logger,
-                                    logging.INFO,
-                                    "etl_db_duplicate_key_retry",
-                                    table=table,
+                            try:
+                                upsert_result = load_table_from_csv(
+                                    LoadRequest(
+                                        table=table,
+                                        csv_path=Path(pipeline_results[table]["local_path"]),
+                                        truncate_before_load=False,
+                                        mode="upsert",
+                                        dataframe=pipeline_results[table].get("dataframe"),
+                                    ),
+                                    database=database_settings,
+                                    chunksize=db_chunksize,
                                 )
-                                try:
-                                    upsert_result = load_table_from_csv(
-                                        LoadRequest(
-                                            table=table,
-                                            csv_path=Path(pipeline_results[table]["local_path"]),
-                                            truncate_before_load=False,
-                                            mode="upsert",
-                                        ),
-                                        database=settings.database,
-                                        chunksize=etl_settings.db_chunksize,
-                                    )
-                                    db_rows[table] = upsert_result.inserted_rows
-                                    info_msg = (
-                                        f"Duplicate key detected for {table}; retried with UPSERT (ON CONFLICT DO NOTHING)."
-                                    )
-                                    if info_msg not in error_history:
-                                        error_history.append(info_msg)
-                                        if error_history_key:
-                                            set_json(error_history_key, error_history, ttl=cache_ttl)
-                                    self._repair_knowledge.record_strategy(table, "upsert", error=str(exc))
-                                    if skip_flag_key and table in skip_tables:
-                                        skip_tables.discard(table)
-                                        set_json(skip_flag_key, sorted(skip_tables), ttl=cache_ttl)
-                                    continue
-                                except DBLoadError as upsert_exc:
-                                    summary = summarize_exception(upsert_exc)
-                                    load_failure_summary = summary
-                                    error_history.append(
+                            except DBLoadError as upsert_exc:
+                                summary = summarize_exception(upsert_exc)
+                                with state_lock:
+                                    _record_error(
                                         f"Attempt {attempt} DB load failed after UPSERT retry: {summary.message}"
                                     )
-                                    if error_history_key:
-                                        set_json(error_history_key, error_history, ttl=cache_ttl)
-                                    log_structured(
-                                        logger,
-                                        logging.WARNING,
-                                        "etl_db_load_failed_after_retry",
-                                        attempt=attempt,
-                                        error=summary.message,
-                                    )
-                                    self._repair_knowledge.clear_strategy(table)
-                                    break
-                            if duplicate_error and load_mode == "upsert":
+                                log_structured(
+                                    logger,
+                                    logging.WARNING,
+                                    "etl_db_load_failed_after_retry",
+                                    attempt=attempt,
+                                    error=summary.message,
+                                )
                                 self._repair_knowledge.clear_strategy(table)
-                            skip_tables.add(table)
-                            if skip_flag_key:
-                                set_json(skip_flag_key, sorted(skip_tables), ttl=cache_ttl)
-                            summary = summarize_exception(exc)
-                            load_failure_summary = summary
-                            error_history.append(f"Attempt {attempt} DB load failed: {summary.message}")
-                            if error_history_key:
-                                set_json(error_history_key, error_history, ttl=cache_ttl)
-                            log_structured(
-                                logger,
-                                logging.WARNING,
-                                "etl_db_load_failed",
-                                attempt=attempt,
-                                error=summary.message,
-                            )
+                                return summary
+                            with state_lock:
+                                db_rows[table] = upsert_result.inserted_rows
+                                info_msg = (
+                                    f"Duplicate key detected for {table}; retried with UPSERT (ON CONFLICT DO NOTHING)."
+                                )
+                                if info_msg not in error_history:
+                                    _record_error(info_msg)
+                                self._repair_knowledge.record_strategy(table, "upsert", error=str(exc))
+                                if table in skip_tables:
+                                    _unskip_table(table)
+                            return None
+                        if duplicate_error and load_mode == "upsert":
+                            self._repair_knowledge.clear_strategy(table)
+                        summary = summarize_exception(exc)
+                        with state_lock:
+                            _skip_table(table)
+                            _record_error(f"Attempt {attempt} DB load failed: {summary.message}")
+                        log_structured(
+                            logger,
+                            logging.WARNING,
+                            "etl_db_load_failed",
+                            attempt=attempt,
+                            error=summary.message,
+                        )
+                        return summary
+
+                    # Parent tables load alone in order; the remaining tables
+                    # only reference them, so each leaf stage loads with
+                    # bounded concurrency. A failure finishes the running
+                    # stage but stops before the next one.
+                    max_workers = max(1, etl_settings.max_concurrent_loads)
+                    for stage in _load_stages(tables):
+                        if len(stage) == 1:
+                            failures = [f for f in (_load_one(stage[0]),) if f]
+                        else:
+                            with ThreadPoolExecutor(max_workers=min(max_workers, len(stage))) as pool:
+                                failures = [f for f in pool.map(_load_one, stage) if f]
+                        if failures:
+                            load_failure_summary = failures[0]
                             break
 
+                    _flush_cache_state()
                     if load_failure_summary:
                         if attempt == self._max_retries:
                             raise AgentExecutionError(
@@ -770,6 +1257,7 @@ class AgentService:
                         error_history.append(message)
                     log_structured(logger, logging.INFO, "etl_db_load_disabled", detail=message)
 
+                _flush_cache_state()
                 summaries = [
                     ETLTableSummary(
                         table=table,
@@ -796,13 +1284,14 @@ class AgentService:
                     tables=[summary.table for summary in summaries],
                 )
                 if cache_key:
-                    set_json(cache_key, _etl_agent_response_to_cache_payload(response), ttl=cache_ttl)
+                    set_text(cache_key, _etl_agent_response_to_cache_payload(response), ttl=cache_ttl)
                 if error_history_key:
                     cache_delete(error_history_key)
                 return response
             except ETLError as exc:
+                _flush_cache_state()
                 summary = summarize_exception(exc)
-                error_history.append(f"Attempt {attempt} pipeline failed: {summary.message}")
+                _record_error(f"Attempt {attempt} pipeline failed: {summary.message}")
                 log_structured(
                     logger,
                     logging.WARNING,
@@ -826,64 +1315,88 @@ class AgentService:
         etl_settings: ETLSettings | None = None,
         catalog: SchemaCatalog | None = None,
     ) -> dict[str, str]:
-        cleaned = payload.strip()
-        if cleaned.startswith("```"):
-            cleaned = cleaned[3:]
-            cleaned = cleaned.strip()
-            if cleaned.lower().startswith("json"):
-                cleaned = cleaned[4:].lstrip()
-            if cleaned.endswith("```"):
-                cleaned = cleaned[:-3]
-            if "" in cleaned:
-                cleaned = cleaned.split("", 1)[1].strip()
-
-        try:
-            data = json.loads(cleaned)
-        except json.JSONDecodeError as exc:
-            raise ValueError("ETL directive is not valid JSON") from exc
-
-        if not isinstance(data, dict) or "table" not in data:
-            raise ValueError("ETL directive must be a JSON object with a 'table' field")
-
-        table = str(data["table"]).strip().lower()
+        table = _directive_table(payload)
         active_settings = etl_settings or get_settings().etl
         active_catalog = catalog or get_schema_catalog(active_settings)
-        if table != "all" and table not in active_catalog.table_names:
-            valid = ["all", *sorted(active_catalog.table_names)]
+        # Membership goes against the tables dict; the sorted listing is only
+        # rendered for the error message.
+        if table != "all" and table not in active_catalog.tables:
+            valid = ["all", *active_catalog.table_names]
             raise ValueError(
                 f"Table '{table}' is not supported. Choose from: {valid}"
             )
         return {"table": table}
 
+    @staticmethod
+    def _execute_cached_sql(sql: str, required_literals: list[str]) -> dict | None:
+        """Run cached SQL fresh; return the result or None if it no longer holds."""
+        try:
+            if required_literals:
+                ensure_required_literals(sql, required_literals)
+            result = execute_query(sql)
+            validate_result(result["rows"])
+        except Exception as exc:
+            log_structured(
+                logger,
+                logging.INFO,
+                "sql_cached_reuse_stale",
+                error=str(exc),
+            )
+            return None
+        return result
+
     @staticmethod
     def _make_etl_cache_key(prompt: str, etl_settings) -> str:
-        prompt_hash = hashlib.md5(prompt.strip().lower().encode("utf-8")).hexdigest()
+        prompt_hash = _digest_hex(prompt.strip().lower().encode("utf-8"))
         raw_dir = Path(etl_settings.raw_dir)
         pattern = getattr(etl_settings, "source_pattern", "*.json") or "*.json"
-        entries: list[str] = [f"pattern={pattern}"]
+        # The directory signature is fed into a streaming hasher entry by
+        # entry, so the full joined string is never materialized; the byte
+        # stream matches the former "|".join layout, keeping keys stable.
+        hasher = _digest_stream()
+        hasher.update(f"pattern={pattern}".encode("utf-8"))
         manifest_path = getattr(etl_settings, "manifest_path", None)
         if manifest_path:
-            entries.append(f"manifest={manifest_path}")
-        if raw_dir.exists():
-            for path in sorted(raw_dir.glob(pattern)):
-                try:
-                    stat = path.stat()
-                except OSError:
-                    continue
-                entries.append(f"{path.name}:{int(stat.st_mtime)}:{stat.st_size}")
-        signature = "|".join(entries)
-        dir_hash = hashlib.md5(signature.encode("utf-8")).hexdigest() if signature else "none"
-        return f"etl:{prompt_hash}:{dir_hash}"
+            hasher.update(f"|manifest={manifest_path}".encode("utf-8"))
+        # os.scandir reuses the dirent metadata from one readdir pass, so
+        # each file costs one stat and no Path allocation.
+        try:
+            with os.scandir(raw_dir) as dir_entries:
+                matched = sorted(
+                    (entry for entry in dir_entries if fnmatch.fnmatchcase(entry.name, pattern)),
+                    key=lambda entry: entry.name,
+                )
+        except OSError:
+            matched = []
+        # Content digests instead of mtimes: a touched-but-unchanged file (or
+        # a fresh checkout of identical sources) keeps the same cache key.
+        # The digest cache re-reads a file only when its stat changes.
+        digest_cache = get_source_digest_cache()
+        for entry in matched:
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            content_hash = digest_cache.digest(
+                entry.path, mtime_ns=stat.st_mtime_ns, size=stat.st_size
+            )
+            hasher.update(f"|{entry.name}:{content_hash}:{stat.st_size}".encode("utf-8"))
+        dir_hash = hasher.hexdigest()
+        # v3 marks the content-digest entry layout; bump it whenever the
+        # digest or the entries layout changes so stale keys can never collide.
+        return f"etl:v3:{prompt_hash}:{dir_hash}"
 
-    def _classify_intent(
+    async def _aclassify_intent(
         self,
         prompt: str,
         history: List[Dict[str, Any]],
         session_id: str,
     ) -> Tuple[Optional[Intent], bool]:
         try:
-            classified, reuse_last = self._intent_classifier.classify(prompt, history)
-            return classified, reuse_last
+            aclassify = getattr(self._intent_classifier, "aclassify", None)
+            if aclassify is not None:
+                return await aclassify(prompt, history)
+            return await asyncio.to_thread(self._intent_classifier.classify, prompt, history)
         except Exception as exc:  # pragma: no cover - keep routing resilient
             log_structured(
                 logger,
@@ -893,7 +1406,36 @@ class AgentService:
             )
             return None, False
 
-    def _record_agent_turn(self, session_id: str, intent: Intent, response: AgentResult) -> None:
+    def _reusable_session_context(self, session_id: str, prompt: str) -> List[str] | None:
+        """Return the previous turn's context when it already covers the prompt.
+
+        Follow-ups like "now group by month" introduce no new schema
+        vocabulary, so re-running the embedding + vector-store round trip
+        would fetch the same chunks again. Reuse is deliberately
+        conservative: every substantive token of the new prompt must appear
+        in the stored chunks, otherwise a fresh retrieval runs.
+        """
+        stored = self._session_context.get(session_id)
+        if not stored:
+            return None
+        tokens = _PROMPT_TOKEN_RE.findall(prompt.lower())
+        if not tokens:
+            return None
+        blob = " ".join(stored).lower()
+        if all(token in blob for token in tokens):
+            log_structured(logger, logging.INFO, "retrieval_skipped_context_reuse")
+            return list(stored)
+        return None
+
+    async def _aretrieve_context(self, prompt: str) -> List[str]:
+        aretrieve = getattr(self._retriever, "aretrieve", None)
+        if aretrieve is not None:
+            return await aretrieve(prompt)
+        return await asyncio.to_thread(self._retriever.retrieve, prompt)
+
+    def _record_agent_turn(
+        self, session_id: str, intent: Intent, response: AgentResult
+    ) -> Dict[str, Any] | None:
         if isinstance(response, SQLAgentResponse):
             rows_preview = response.rows[:5]
             agent_turn = {
@@ -916,24 +1458,38 @@ class AgentService:
                 "errors": response.errors,
                 "summary": f"Processed tables: {', '.join(item['table'] for item in results_preview)}",
             }
-        append_agent_turn(session_id, agent_turn)
+        return append_agent_turn(session_id, agent_turn)
 
 
-def _build_history_prompt(history: List[Dict[str, Any]], max_turns: int = 4) -> str:
-    relevant = history[-max_turns:]
+@lru_cache(maxsize=256)
+def _render_history_cached(turns: Tuple[Tuple[str, str], ...]) -> str:
     lines: List[str] = []
-    for turn in relevant:
+    for label, text in turns:
+        if label == "user":
+            lines.append(f"User: {text}")
+        else:
+            if text and len(text) > 400:
+                text = text[:400] + " ..."
+            lines.append(f"Agent ({label}): {text}")
+    return "\n".join(lines).strip()
+
+
+def _build_history_prompt(history: List[Dict[str, Any]], max_turns: int = 4) -> str:
+    """Render the trailing history window, memoized on its content.
+
+    The window only gains a suffix between turns, so rendering it from the
+    same (label, text) tuple keeps the block byte-identical across the SQL
+    and ETL probes of one request — and across retries — which both skips
+    re-rendering and keeps provider-side prefix caches warm.
+    """
+    turns: List[Tuple[str, str]] = []
+    for turn in history[-max_turns:]:
         role = turn.get("role")
         if role == "user":
-            prompt_text = turn.get("prompt", "")
-            lines.append(f"User: {prompt_text}")
+            turns.append(("user", turn.get("prompt", "")))
         elif role == "agent":
-            intent = turn.get("intent", "agent")
-            summary = turn.get("summary") or turn.get("sql") or ""
-            if summary and len(summary) > 400:
-                summary = summary[:400] + " ..."
-            lines.append(f"Agent ({intent}): {summary}")
-    return "\n".join(lines).strip()
+            turns.append((turn.get("intent", "agent"), turn.get("summary") or turn.get("sql") or ""))
+    return _render_history_cached(tuple(turns))
 
 
 def _augment_prompt_with_history(prompt: str, history: List[Dict[str, Any]]) -> str:
@@ -943,79 +1499,114 @@ def _augment_prompt_with_history(prompt: str, history: List[Dict[str, Any]]) ->
     return f"{history_block}\n\nUser: {prompt}"
 
 
+def _schema_version_hash() -> str | None:
+    """Digest of the table/column layout so DDL changes invalidate SQL reuse."""
+    try:
+        catalog = get_schema_catalog()
+    except Exception:  # pragma: no cover - caching is best-effort
+        return None
+    signature = "|".join(
+        f"{table}:{','.join(catalog.get_columns(table))}" for table in catalog.table_names
+    )
+    return _digest_hex(signature.encode("utf-8"))
+
+
+# Substantive prompt tokens for the context-reuse check; short filler
+# words (by, now, the, ...) never decide whether retrieval is needed.
+_PROMPT_TOKEN_RE = re.compile(r"[a-z]{4,}")
+
+# Prompts that unambiguously ask for the full pipeline ("run the ETL",
+# "load everything", ...); these need no LLM directive (see _run_etl).
+_TRIVIAL_ETL_RE = re.compile(r"\b(run|ingest|load|refresh)\b.*\b(all|everything|pipeline)\b", re.IGNORECASE)
+
+_DATE_LITERAL_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_UUID_LITERAL_RE = re.compile(
+    r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b",
+    re.IGNORECASE,
+)
+
+
 def _extract_required_literals(prompt: str) -> list[str]:
     """Extract literal tokens (dates, UUIDs) that must appear in generated SQL."""
-    import re
+    return _DATE_LITERAL_RE.findall(prompt) + _UUID_LITERAL_RE.findall(prompt)
+
+
+class _CachedTableSummary(msgspec.Struct):
+    """msgspec mirror of :class:`ETLTableSummary` for the Redis payload codec."""
+
+    table: str = ""
+    row_count: int = 0
+    local_path: str = ""
+    s3_uri: str | None = None
+    loaded_rows: int | None = None
+
+
+class _CachedETLResponse(msgspec.Struct):
+    """msgspec mirror of :class:`ETLAgentResponse`; intent travels as its name."""
+
+    intent: str = "ETL"
+    attempts: int = 1
+    errors: list[str] = []
+    context: list[str] = []
+    results: list[_CachedTableSummary] = []
 
-    dates = re.findall(r"\d{4}-\d{2}-\d{2}", prompt)
-    uuids = re.findall(
-        r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}",
-        prompt,
-        flags=re.IGNORECASE,
+
+# Reusable decoder: parsing straight into structs skips the intermediate
+# dict tree (and its per-key hashing) that a plain JSON load would build.
+_ETL_CACHE_DECODER = msgspec.json.Decoder(_CachedETLResponse)
+
+
+def _etl_agent_response_to_cache_payload(response: ETLAgentResponse) -> bytes:
+    return msgspec.json.encode(
+        _CachedETLResponse(
+            intent=response.intent.name,
+            attempts=response.attempts,
+            errors=list(response.errors),
+            context=list(response.context),
+            results=[
+                _CachedTableSummary(
+                    table=summary.table,
+                    row_count=summary.row_count,
+                    local_path=summary.local_path,
+                    s3_uri=summary.s3_uri,
+                    loaded_rows=summary.loaded_rows,
+                )
+                for summary in response.results
+            ],
+        )
     )
-    return dates + uuids
-
-
-def _etl_agent_response_to_cache_payload(response: ETLAgentResponse) -> dict[str, object]:
-    return {
-        "intent": response.intent.name,
-        "attempts": response.attempts,
-        "errors": response.errors,
-        "context": response.context,
-        "results": [
-            {
-                "table": summary.table,
-                "row_count": summary.row_count,
-                "local_path": summary.local_path,
-                "s3_uri": summary.s3_uri,
-                "loaded_rows": summary.loaded_rows,
-            }
-            for summary in response.results
-        ],
-    }
 
 
-def _cached_response_to_etl_agent_response(payload: dict[str, object]) -> ETLAgentResponse:
-    results_payload = payload.get("results") or []
+def _cached_response_to_etl_agent_response(payload: str | bytes) -> ETLAgentResponse | None:
+    """Decode a cached ETL payload; return ``None`` for stale/corrupt blobs."""
+    try:
+        decoded = _ETL_CACHE_DECODER.decode(payload)
+    except msgspec.DecodeError:
+        return None
     summaries = [
         ETLTableSummary(
-            table=item.get("table", ""),
-            row_count=int(item.get("row_count", 0)),
-            local_path=item.get("local_path", ""),
-            s3_uri=item.get("s3_uri"),
-            loaded_rows=item.get("loaded_rows"),
+            table=item.table,
+            row_count=item.row_count,
+            local_path=item.local_path,
+            s3_uri=item.s3_uri,
+            loaded_rows=item.loaded_rows,
         )
-        for item in results_payload
-        if isinstance(item, dict)
+        for item in decoded.results
     ]
-    intent_name = payload.get("intent", "ETL")
     try:
-        intent = Intent[intent_name]
-    except (KeyError, TypeError):
+        intent = Intent[decoded.intent]
+    except KeyError:
         intent = Intent.ETL
-    errors = payload.get("errors") or []
-    context = payload.get("context") or []
     return ETLAgentResponse(
         results=summaries,
         intent=intent,
-        attempts=int(payload.get("attempts", 1)),
+        attempts=decoded.attempts,
         repaired=False,
-        errors=list(errors),
-        context=list(context) if isinstance(context, list) else [],
+        errors=list(decoded.errors),
+        context=list(decoded.context),
     )
 
 
-def _order_tables(tables: list[str]) -> list[str]:
-    ordered: list[str] = []
-    seen = set()
-    for table in PREFERRED_LOAD_ORDER:
-        if table in tables:
-            ordered.append(table)
-            seen.add(table)
-    for table in tables:
-        if table not in seen:
-            ordered.append(table)
-    return ordered
 PREFERRED_LOAD_ORDER = [
     "patients",
     "encounters",
@@ -1024,3 +1615,34 @@ PREFERRED_LOAD_ORDER = [
     "medications",
     "conditions",
 ]
+
+_PREFERRED_INDEX = {table: index for index, table in enumerate(PREFERRED_LOAD_ORDER)}
+
+
+def _order_tables(tables: list[str]) -> list[str]:
+    # Stable sort: unknown tables rank behind the preferred ones and keep
+    # their input order.
+    return sorted(tables, key=lambda table: _PREFERRED_INDEX.get(table, len(_PREFERRED_INDEX)))
+
+
+@lru_cache(maxsize=32)
+def _order_tables_cached(tables: tuple[str, ...]) -> tuple[str, ...]:
+    """Memoized :func:`_order_tables` for invariant table sets."""
+    return tuple(_order_tables(list(tables)))
+
+
+_LOAD_STAGE_PARENTS = ("patients", "encounters")
+
+
+def _load_stages(tables: list[str]) -> list[list[str]]:
+    """Group ordered tables into stages that can load concurrently.
+
+    ``patients`` and ``encounters`` are referenced by every other table,
+    so each loads alone and in order; the remaining tables only point at
+    those parents and form a single concurrent stage.
+    """
+    stages = [[table] for table in _LOAD_STAGE_PARENTS if table in tables]
+    leaves = [table for table in tables if table not in _LOAD_STAGE_PARENTS]
+    if leaves:
+        stages.append(leaves)
+    return stages
@@ -37,6 +37,7 @@ def execute_query(query: str, params: dict[str, Any] | None = None) -> dict[str,
 
 
 def _result_to_dicts(result: Result) -> List[Dict[str, Any]]:
-    cursor_metadata = result.keys()
-    return [dict(zip(cursor_metadata, row)) for row in result.fetchall()]
+    # mappings() streams rows straight into dicts in one pass, instead of
+    # buffering tuples with fetchall() and re-zipping each row in Python.
+    return [dict(row) for row in result.mappings()]
 
@@ -0,0 +1,72 @@
+"""Embedding-keyed cache of known-good SQL for paraphrased prompts."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+_CACHE_SIZE = 256
+_SIM_THRESHOLD = 0.92
+# Entries expire so schema-doc or data drift cannot serve stale SQL forever;
+# a schema-hash mismatch invalidates immediately on DDL changes.
+_TTL_SECONDS = 600.0
+
+
+class SQLSemanticCache:
+    """Maps prompt embeddings to SQL that previously executed successfully.
+
+    Lookups are a dot product against the stored L2-normalised embeddings,
+    mirroring the retriever's semantic cache; there is no network round-trip.
+    A hit only means "reuse this SQL" — callers still execute and validate
+    the statement, so the worst case is one wasted query, never a wrong
+    answer served from memory.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: float = _SIM_THRESHOLD,
+        max_entries: int = _CACHE_SIZE,
+        ttl_seconds: float = _TTL_SECONDS,
+    ) -> None:
+        self._threshold = threshold
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._embeddings: np.ndarray | None = None  # [N, D] float32, L2-normalised
+        self._entries: List[tuple[float, str, str]] = []  # (stored_at, schema_hash, sql)
+
+    def get(self, embedding: np.ndarray, *, schema_hash: str) -> Optional[str]:
+        """Return cached SQL for the nearest prompt, or None on a miss."""
+        with self._lock:
+            if self._embeddings is None or not self._entries:
+                return None
+            sims = self._embeddings @ embedding
+            best = int(np.argmax(sims))
+            if sims[best] < self._threshold:
+                return None
+            stored_at, stored_hash, sql = self._entries[best]
+        if stored_hash != schema_hash:
+            return None
+        if time.monotonic() - stored_at > self._ttl_seconds:
+            return None
+        return sql
+
+    def put(self, embedding: np.ndarray, sql: str, *, schema_hash: str) -> None:
+        row = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        with self._lock:
+            if self._embeddings is None:
+                self._embeddings = row
+            else:
+                self._embeddings = np.vstack([self._embeddings, row])
+            self._entries.append((time.monotonic(), schema_hash, sql))
+            if len(self._entries) > self._max_entries:
+                self._embeddings = self._embeddings[1:]
+                self._entries.pop(0)
@@ -21,7 +21,15 @@ class ValidationSummary:
 
 
 def validate_result(rows: Sequence[dict]) -> None:
-    """Ensure the SQL result set passes baseline sanity checks."""
+    """Ensure the SQL result set passes baseline sanity checks.
+
+    Deliberately constant-time: type and range enforcement happens in the
+    database schema, so validation here never iterates the rows. Should a
+    per-row numeric check ever be added, convert the dict rows to
+    per-column arrays first rather than JIT-compiling a loop over dicts —
+    compiled paths cannot unbox Python dicts, and the rows must stay
+    dict-shaped for the API layer regardless.
+    """
     if not rows:
         raise ValidationError("Query returned no rows; relax filters or adjust the time window.")
 
@@ -3,11 +3,14 @@
 from __future__ import annotations
 
 import logging
+from decimal import Decimal
 from time import perf_counter
 from typing import Any, Dict, List, Optional, Union
 from uuid import uuid4
 
+import orjson
 from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from app.agent.guardrails import GuardrailViolation
@@ -31,7 +34,33 @@ from app.core.logging import (
 configure_logging()
 logger = get_logger(__name__)
 
-app = FastAPI(title="Agentic RAG Data Analytics Assistant")
+def _orjson_default(value: Any) -> Any:
+    # SQL rows arrive straight from the driver, so Decimal columns reach
+    # the encoder; match jsonable_encoder's old float coercion and fall
+    # back to str for anything else (UUIDs, intervals).
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+class QueryJSONResponse(Response):
+    """JSON response rendered by orjson with a hook for driver-native values.
+
+    Built on the plain ``Response`` rather than the deprecated
+    ``fastapi.responses.ORJSONResponse``, which only contributed a
+    ``render()`` this class overrides anyway.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default)
+
+
+app = FastAPI(
+    title="Agentic RAG Data Analytics Assistant",
+    default_response_class=QueryJSONResponse,
+)
 service = AgentService()
 
 
@@ -115,9 +144,48 @@ class ETLQueryResponse(BaseModel):
 
 QueryResponse = Union[SQLQueryResponse, ETLQueryResponse]
 
+# Rows flushed per streamed chunk; large enough to amortize the ASGI
+# send overhead, small enough that no chunk approaches the full payload.
+_STREAM_ROWS_PER_CHUNK = 200
+
+
+def _stream_sql_payload(response: SQLAgentResponse, session_id: str, history: List[Dict[str, Any]]):
+    """Yield the SQL response as incremental JSON chunks.
+
+    The envelope (everything but rows) is encoded first and reopened so the
+    row array can be appended chunk by chunk. Rows stay materialized in the
+    service layer — the retry and cache paths read them — but the serialized
+    payload never exists as one byte string, so peak memory for large result
+    sets is one chunk rather than the whole body, and the first bytes leave
+    before the last row is encoded.
+    """
+    envelope = {
+        "sql": response.sql,
+        "intent": response.intent.name,
+        "limit_enforced": response.limit_enforced,
+        "columns": response.columns,
+        "attempts": response.attempts,
+        "repaired": response.repaired,
+        "errors": response.errors,
+        "context": response.context,
+        "session_id": session_id,
+        "history": history,
+        "no_results_stable": response.no_results_stable,
+        "stability_attempts": response.stability_attempts,
+    }
+    yield orjson.dumps(envelope, default=_orjson_default)[:-1] + b',"rows":['
+    rows = response.rows
+    for start in range(0, len(rows), _STREAM_ROWS_PER_CHUNK):
+        chunk = b",".join(
+            orjson.dumps(row, default=_orjson_default)
+            for row in rows[start : start + _STREAM_ROWS_PER_CHUNK]
+        )
+        yield chunk if start == 0 else b"," + chunk
+    yield b"]}"
+
 
 @app.post("/query", response_model=QueryResponse)
-async def query(request: QueryRequest) -> QueryResponse:
+async def query(request: QueryRequest) -> Response:
     logger.info("Received query request")
     session_id = request.session_id or str(uuid4())
     session_token = set_session_id(session_id)
@@ -130,7 +198,7 @@ async def query(request: QueryRequest) -> QueryResponse:
             prompt_preview=(request.prompt[:160] if request.prompt else ""),
             session_id=session_id,
         )
-        response, session_id, history = service.handle_query(request.prompt, session_id=session_id)
+        response, session_id, history = await service.ahandle_query(request.prompt, session_id=session_id)
     except GuardrailViolation as exc:
         log_structured(logger, logging.WARNING, "guardrail_violation", error=str(exc))
         raise HTTPException(status_code=400, detail=str(exc)) from exc
@@ -152,42 +220,37 @@ async def query(request: QueryRequest) -> QueryResponse:
     finally:
         reset_session_id(session_token)
 
+    # Returning a Response directly skips FastAPI's response_model
+    # re-validation and the jsonable_encoder walk, both of which touch
+    # every row dict; the models above still describe the schema for
+    # OpenAPI. orjson then serializes the plain dicts in one C pass.
     if isinstance(response, SQLAgentResponse):
-        return SQLQueryResponse(
-            sql=response.sql,
-            intent=response.intent.name,
-            limit_enforced=response.limit_enforced,
-            columns=response.columns,
-            rows=response.rows,
-            attempts=response.attempts,
-            repaired=response.repaired,
-            errors=response.errors,
-            context=response.context,
-            session_id=session_id,
-            history=history,
-            no_results_stable=response.no_results_stable,
-            stability_attempts=response.stability_attempts,
+        return StreamingResponse(
+            _stream_sql_payload(response, session_id, history),
+            media_type="application/json",
         )
 
     if isinstance(response, ETLAgentResponse):
-        return ETLQueryResponse(
-            results=[
-                ETLTableResponse(
-                    table=summary.table,
-                    row_count=summary.row_count,
-                    local_path=summary.local_path,
-                    s3_uri=summary.s3_uri,
-                    loaded_rows=summary.loaded_rows,
-                )
-                for summary in response.results
-            ],
-            intent=response.intent.name,
-            attempts=response.attempts,
-            repaired=response.repaired,
-            errors=response.errors,
-            context=response.context,
-            session_id=session_id,
-            history=history,
+        return QueryJSONResponse(
+            {
+                "results": [
+                    {
+                        "table": summary.table,
+                        "row_count": summary.row_count,
+                        "local_path": summary.local_path,
+                        "s3_uri": summary.s3_uri,
+                        "loaded_rows": summary.loaded_rows,
+                    }
+                    for summary in response.results
+                ],
+                "intent": response.intent.name,
+                "attempts": response.attempts,
+                "repaired": response.repaired,
+                "errors": response.errors,
+                "context": response.context,
+                "session_id": session_id,
+                "history": history,
+            }
         )
 
     raise HTTPException(status_code=500, detail="Unsupported response type")
@@ -2,9 +2,10 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
 from typing import Any
 
+import orjson
 import redis
 
 from app.core.config import get_settings
@@ -15,11 +16,23 @@ settings = get_settings()
 
 _redis_client: redis.Redis | None = None
 
+# Bounded connection pool: the default pool grows without limit under
+# concurrent handler threads, each new connection paying a TCP (or UDS —
+# from_url handles unix:// natively) handshake. BlockingConnectionPool
+# caps the fan-out and makes excess callers wait for a free connection
+# instead. The client stays sync: handlers run in worker threads, and the
+# event loop only reaches the cache through the asyncio.to_thread
+# wrappers below.
+_POOL_MAX_CONNECTIONS = 64
+
 if settings.cache and settings.cache.redis_url:
     try:
-        _redis_client = redis.Redis.from_url(
-            settings.cache.redis_url,
-            decode_responses=True,
+        _redis_client = redis.Redis(
+            connection_pool=redis.BlockingConnectionPool.from_url(
+                settings.cache.redis_url,
+                max_connections=_POOL_MAX_CONNECTIONS,
+                decode_responses=True,
+            )
         )
         # Smoke test connection (non fatal)
         _redis_client.ping()
@@ -43,17 +56,100 @@ def get_json(key: str) -> Any | None:
     except Exception as exc:  # pragma: no cover
         logger.warning("Redis get failed for key %s: %s", key, exc)
         return None
-    return json.loads(value) if value else None
+    return orjson.loads(value) if value else None
+
+
+def get_json_many(keys: list[str]) -> list[Any | None]:
+    """Retrieve several JSON payloads in one pipelined round-trip."""
+    if not _redis_client or not keys:
+        return [None] * len(keys)
+    try:
+        pipe = _redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(key)
+        values = pipe.execute()
+    except Exception as exc:  # pragma: no cover
+        logger.warning("Redis pipelined get failed for keys %s: %s", keys, exc)
+        return [None] * len(keys)
+    return [orjson.loads(value) if value else None for value in values]
+
+
+def get_json_list_and_value(list_key: str, value_key: str) -> tuple[list[Any], Any | None]:
+    """Fetch a JSON list and a JSON blob in one pipelined round-trip."""
+    if not _redis_client:
+        return [], None
+    try:
+        pipe = _redis_client.pipeline(transaction=False)
+        pipe.lrange(list_key, 0, -1)
+        pipe.get(value_key)
+        items, value = pipe.execute()
+    except Exception as exc:  # pragma: no cover
+        logger.warning("Redis pipelined fetch failed for keys %s/%s: %s", list_key, value_key, exc)
+        return [], None
+    parsed_items = [orjson.loads(item) for item in items if item]
+    return parsed_items, orjson.loads(value) if value else None
+
+
+def get_value_list_and_set(
+    value_key: str, list_key: str, set_key: str
+) -> tuple[str | None, list[Any], set[str]]:
+    """Fetch a raw blob, a JSON list, and a plain-string set in one round-trip.
+
+    The blob is returned undecoded so the caller can apply its own codec
+    (the ETL response cache decodes it with msgspec).
+    """
+    if not _redis_client:
+        return None, [], set()
+    try:
+        pipe = _redis_client.pipeline(transaction=False)
+        pipe.get(value_key)
+        pipe.lrange(list_key, 0, -1)
+        pipe.smembers(set_key)
+        value, items, members = pipe.execute()
+    except Exception as exc:  # pragma: no cover
+        logger.warning(
+            "Redis pipelined fetch failed for keys %s/%s/%s: %s", value_key, list_key, set_key, exc
+        )
+        return None, [], set()
+    parsed_items = [orjson.loads(item) for item in items if item]
+    return value if value else None, parsed_items, set(members)
 
 
 def get_json_list(key: str) -> list[Any]:
-    """Retrieve a list stored as JSON; return empty list when missing."""
-    payload = get_json(key)
-    if isinstance(payload, list):
-        return payload
-    if payload is None:
+    """Retrieve a Redis list of JSON-encoded items; return empty list when missing."""
+    if not _redis_client:
+        return []
+    try:
+        values = _redis_client.lrange(key, 0, -1)
+    except Exception as exc:  # pragma: no cover
+        logger.warning("Redis lrange failed for key %s: %s", key, exc)
         return []
-    return [payload]
+    return [orjson.loads(value) for value in values if value]
+
+
+def get_text(key: str) -> str | None:
+    """Retrieve a raw payload without JSON-decoding (caller owns the codec)."""
+    if not _redis_client:
+        return None
+    try:
+        return _redis_client.get(key)
+    except Exception as exc:  # pragma: no cover
+        logger.warning("Redis get failed for key %s: %s", key, exc)
+        return None
+
+
+def set_text(key: str, payload: str | bytes, ttl: int | None = None) -> None:
+    """Store a pre-encoded payload with optional TTL (caller owns the codec)."""
+    if not _redis_client:
+        return
+    try:
+        ttl_seconds = ttl or (settings.cache.ttl_seconds if settings.cache else None)
+        if ttl_seconds:
+            _redis_client.setex(key, ttl_seconds, payload)
+        else:
+            _redis_client.set(key, payload)
+    except Exception as exc:  # pragma: no cover
+        logger.warning("Redis set failed for key %s: %s", key, exc)
 
 
 def set_json(key: str, payload: Any, ttl: int | None = None) -> None:
@@ -62,7 +158,7 @@ def set_json(key: str, payload: Any, ttl: int | None = None) -> None:
         return
     try:
         ttl_seconds = ttl or (settings.cache.ttl_seconds if settings.cache else None)
-        data = json.dumps(payload)
+        data = orjson.dumps(payload)
         if ttl_seconds:
             _redis_client.setex(key, ttl_seconds, data)
         else:
@@ -71,13 +167,152 @@ def set_json(key: str, payload: Any, ttl: int | None = None) -> None:
         logger.warning("Redis set failed for key %s: %s", key, exc)
 
 
+def set_json_many(items: dict[str, Any], ttl: int | None = None) -> None:
+    """Store several JSON payloads in one pipelined round-trip."""
+    if not _redis_client or not items:
+        return
+    try:
+        ttl_seconds = ttl or (settings.cache.ttl_seconds if settings.cache else None)
+        pipe = _redis_client.pipeline(transaction=False)
+        for key, payload in items.items():
+            data = orjson.dumps(payload)
+            if ttl_seconds:
+                pipe.setex(key, ttl_seconds, data)
+            else:
+                pipe.set(key, data)
+        pipe.execute()
+    except Exception as exc:  # pragma: no cover
+        logger.warning("Redis pipelined set failed for keys %s: %s", list(items), exc)
+
+
+async def aget_json(key: str) -> Any | None:
+    """Async variant of :func:`get_json`; runs the blocking client off-loop."""
+    return await asyncio.to_thread(get_json, key)
+
+
+async def aget_json_many(keys: list[str]) -> list[Any | None]:
+    """Async variant of :func:`get_json_many`."""
+    return await asyncio.to_thread(get_json_many, keys)
+
+
+async def aset_json(key: str, payload: Any, ttl: int | None = None) -> None:
+    """Async variant of :func:`set_json`."""
+    await asyncio.to_thread(set_json, key, payload, ttl)
+
+
 def append_json_list(key: str, item: Any, *, ttl: int | None = None, max_items: int | None = None) -> None:
-    """Append an item to a JSON list stored at key."""
-    current = get_json_list(key)
-    current.append(item)
-    if max_items and len(current) > max_items:
-        current = current[-max_items:]
-    set_json(key, current, ttl=ttl)
+    """Append an item to a Redis list, trimming and refreshing TTL atomically.
+
+    RPUSH, LTRIM, and EXPIRE travel in a single MULTI/EXEC pipeline so each
+    appended turn costs one round-trip instead of three.
+    """
+    if not _redis_client:
+        return
+    try:
+        ttl_seconds = ttl or (settings.cache.ttl_seconds if settings.cache else None)
+        with _redis_client.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, orjson.dumps(item))
+            if max_items:
+                pipe.ltrim(key, -max_items, -1)
+            if ttl_seconds:
+                pipe.expire(key, ttl_seconds)
+            pipe.execute()
+    except Exception as exc:  # pragma: no cover
+        logger.warning("Redis list append failed for key %s: %s", key, exc)
+
+
+def extend_json_list(
+    key: str, items: list[Any], *, ttl: int | None = None, max_items: int | None = None
+) -> None:
+    """Append several items to a Redis list in one pipelined round-trip.
+
+    Like :func:`append_json_list`, but pushes a batch of new entries without
+    re-serializing anything already stored.
+    """
+    if not _redis_client or not items:
+        return
+    try:
+        ttl_seconds = ttl or (settings.cache.ttl_seconds if settings.cache else None)
+        with _redis_client.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, *(orjson.dumps(item) for item in items))
+            if max_items:
+                pipe.ltrim(key, -max_items, -1)
+            if ttl_seconds:
+                pipe.expire(key, ttl_seconds)
+            pipe.execute()
+    except Exception as exc:  # pragma: no cover
+        logger.warning("Redis list extend failed for key %s: %s", key, exc)
+
+
+def apply_state_deltas(
+    *,
+    list_key: str | None = None,
+    list_items: list[Any] | None = None,
+    set_key: str | None = None,
+    add: set[str] | None = None,
+    remove: set[str] | None = None,
+    ttl: int | None = None,
+    max_items: int | None = None,
+) -> None:
+    """Push list appends and set-membership deltas in one pipelined round-trip.
+
+    Combines :func:`extend_json_list` and :func:`update_set` so callers that
+    flush both kinds of state per attempt (the ETL retry loop) pay a single
+    RTT instead of two.
+    """
+    push_list = bool(list_key and list_items)
+    touch_set = bool(set_key and (add or remove))
+    if not _redis_client or not (push_list or touch_set):
+        return
+    try:
+        ttl_seconds = ttl or (settings.cache.ttl_seconds if settings.cache else None)
+        with _redis_client.pipeline(transaction=True) as pipe:
+            if push_list:
+                pipe.rpush(list_key, *(orjson.dumps(item) for item in list_items))
+                if max_items:
+                    pipe.ltrim(list_key, -max_items, -1)
+                if ttl_seconds:
+                    pipe.expire(list_key, ttl_seconds)
+            if touch_set:
+                if add:
+                    pipe.sadd(set_key, *add)
+                if remove:
+                    pipe.srem(set_key, *remove)
+                if ttl_seconds:
+                    pipe.expire(set_key, ttl_seconds)
+            pipe.execute()
+    except Exception as exc:  # pragma: no cover
+        logger.warning(
+            "Redis state-delta flush failed for keys %s/%s: %s", list_key, set_key, exc
+        )
+
+
+def update_set(
+    key: str,
+    *,
+    add: set[str] | None = None,
+    remove: set[str] | None = None,
+    ttl: int | None = None,
+) -> None:
+    """Apply membership deltas to a Redis set in one pipelined round-trip.
+
+    SADD/SREM cost O(delta) regardless of how large the stored set has grown,
+    so callers never need to re-serialize (or sort) the full membership.
+    """
+    if not _redis_client or not (add or remove):
+        return
+    try:
+        ttl_seconds = ttl or (settings.cache.ttl_seconds if settings.cache else None)
+        with _redis_client.pipeline(transaction=True) as pipe:
+            if add:
+                pipe.sadd(key, *add)
+            if remove:
+                pipe.srem(key, *remove)
+            if ttl_seconds:
+                pipe.expire(key, ttl_seconds)
+            pipe.execute()
+    except Exception as exc:  # pragma: no cover
+        logger.warning("Redis set update failed for key %s: %s", key, exc)
 
 
 def delete(key: str) -> None:
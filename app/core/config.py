@@ -80,6 +80,7 @@ class ETLSettings:
     enable_db_load: bool = False
     truncate_before_load: bool = False
     db_chunksize: int = 1000
+    max_concurrent_loads: int = 4
     source_pattern: str = "*.json"
     manifest_path: str | None = None
 
@@ -102,6 +103,7 @@ class Settings:
     etl: ETLSettings
     llm_proxy_url: str
     llm_timeout_seconds: float = 30.0
+    llm_cache_enabled: bool = False
     default_result_limit: int = 1000
     agent_max_retries: int = 3
     cache: CacheSettings | None = None
@@ -155,6 +157,7 @@ def get_settings() -> Settings:
         enable_db_load=_get_env("ETL_ENABLE_DB_LOAD", "false").lower() in {"true", "1", "yes"},
         truncate_before_load=_get_env("ETL_DB_TRUNCATE", "false").lower() in {"true", "1", "yes"},
         db_chunksize=int(_get_env("ETL_DB_CHUNKSIZE", "1000")),
+        max_concurrent_loads=int(_get_env("ETL_MAX_CONCURRENT_LOADS", "4")),
         source_pattern=_get_env("ETL_SOURCE_PATTERN", "*.json"),
         manifest_path=_get_env("ETL_MANIFEST_PATH"),
     )
@@ -170,6 +173,7 @@ def get_settings() -> Settings:
         etl=etl,
         llm_proxy_url=llm_proxy_url,
         llm_timeout_seconds=float(_get_env("LLM_TIMEOUT_SECONDS", "30")),
+        llm_cache_enabled=_get_env("LLM_CACHE_ENABLED", "false").lower() in {"true", "1", "yes"},
         default_result_limit=int(_get_env("DEFAULT_RESULT_LIMIT", "1000")),
         agent_max_retries=int(_get_env("AGENT_MAX_RETRIES", "3")),
         cache=cache,
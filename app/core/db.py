@@ -27,6 +27,11 @@ def get_engine() -> Engine:
             settings.url,
             pool_size=settings.pool_size,
             max_overflow=settings.max_overflow,
+            # Recycle pooled connections so long-lived ETL sessions survive
+            # server-side idle timeouts, and pre-ping so a stale connection
+            # costs one round-trip instead of a failed query.
+            pool_pre_ping=True,
+            pool_recycle=1800,
             future=True,
         )
     return _engine
@@ -0,0 +1,73 @@
+"""Debounced atomic JSON persistence for the on-disk agent caches."""
+
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+import time
+from pathlib import Path
+
+import orjson
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+_DEBOUNCE_SECONDS = 0.5
+
+
+class DebouncedJsonWriter:
+    """Write JSON snapshots atomically from a background thread.
+
+    Callers hand over a snapshot via :meth:`submit` and return immediately;
+    bursts of updates coalesce to at most one disk write per debounce window.
+    Each write lands in a temp file that is renamed over the target, so
+    readers never observe a partial file. A flush hook runs at interpreter
+    exit so the final snapshot is not lost.
+    """
+
+    def __init__(self, path: Path, *, debounce_seconds: float = _DEBOUNCE_SECONDS) -> None:
+        self._path = path
+        self._debounce = debounce_seconds
+        self._pending: object | None = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: threading.Thread | None = None
+        atexit.register(self.flush)
+
+    def submit(self, payload: object) -> None:
+        """Queue a snapshot for writing; later submissions supersede it."""
+        with self._lock:
+            self._pending = payload
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=f"json-writer:{self._path.name}", daemon=True
+                )
+                self._thread.start()
+        self._wakeup.set()
+
+    def flush(self) -> None:
+        """Write any pending snapshot synchronously."""
+        self._write_pending()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            time.sleep(self._debounce)
+            self._write_pending()
+
+    def _write_pending(self) -> None:
+        with self._lock:
+            payload, self._pending = self._pending, None
+        if payload is None:
+            return
+        try:
+            data = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2)
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.parent / f"{self._path.name}.tmp"
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, self._path)
+        except Exception as exc:  # pragma: no cover - disk errors must not kill callers
+            logger.warning("Background JSON write to %s failed: %s", self._path, exc)
@@ -2,10 +2,10 @@
 
 from __future__ import annotations
 
-import logging
-import json
 import logging
 import re
+
+import orjson
 from contextvars import ContextVar, Token
 from typing import Any, Dict, Optional
 
@@ -85,9 +85,20 @@ def redact_mapping(mapping: Dict[str, Any]) -> Dict[str, Any]:
 
 
 def log_structured(logger: logging.Logger, level: int, message: str, **fields: Any) -> None:
-    """Emit a structured log entry with contextual metadata."""
+    """Emit a structured log entry with contextual metadata.
+
+    Filtered levels return before redaction and serialization, so hot-loop
+    call sites do not need their own ``isEnabledFor`` guards.
+    """
+    if not logger.isEnabledFor(level):
+        return
     payload = redact_mapping(fields)
     payload.setdefault("request_id", get_request_id())
     payload.setdefault("session_id", get_session_id())
-    logger.log(level, "%s | %s", message, json.dumps(payload, default=str, sort_keys=True))
+    logger.log(
+        level,
+        "%s | %s",
+        message,
+        orjson.dumps(payload, option=orjson.OPT_SORT_KEYS, default=str).decode(),
+    )
 
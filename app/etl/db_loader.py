@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import io
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable
@@ -33,6 +34,9 @@ class LoadRequest:
     csv_path: Path
     truncate_before_load: bool = False
     mode: str = "insert"
+    # When the pipeline still holds the curated dataframe in memory, passing
+    # it here skips re-reading ``csv_path`` from disk.
+    dataframe: pd.DataFrame | None = None
 
 
 @dataclass(frozen=True)
@@ -51,7 +55,7 @@ def load_table_from_csv(
     """Load a single CSV file into the configured database table."""
 
     csv_path = request.csv_path
-    if not csv_path.exists():
+    if request.dataframe is None and not csv_path.exists():
         raise DBLoadError(f"Source CSV not found: {csv_path}")
 
     # Avoid leaking credentials when logging target.
@@ -62,7 +66,7 @@ def load_table_from_csv(
     logger.info("Loading CSV into table %s from %s", request.table, csv_path)
 
     try:
-        df = pd.read_csv(csv_path)
+        df = request.dataframe if request.dataframe is not None else pd.read_csv(csv_path)
         df = normalize_date_columns(df, request.table)
         df = normalize_uuid_columns(df, request.table)
     except Exception as exc:  # pragma: no cover - pandas error surface
@@ -109,6 +113,12 @@ def load_table_from_csv(
                     dataframe=df,
                     chunksize=chunksize,
                 )
+            elif backend_name and backend_name.startswith("postgresql"):
+                inserted_rows = _execute_postgres_copy(
+                    connection,
+                    table_name=request.table,
+                    dataframe=df,
+                )
             else:
                 if load_mode == "upsert" and not (backend_name and backend_name.startswith("postgresql")):
                     logger.warning(
@@ -131,27 +141,69 @@ def load_table_from_csv(
     return LoadResult(table=request.table, inserted_rows=inserted_rows, source_path=csv_path)
 
 
+def _execute_postgres_copy(connection, *, table_name: str, dataframe: pd.DataFrame) -> int:
+    """Stream the dataframe into Postgres with server-side COPY.
+
+    One CSV stream through STDIN replaces thousands of multi-row INSERT
+    statements; the data is serialized once, in memory, and never touches
+    disk. ``convert_dtypes`` keeps nullable integer columns from being
+    rendered as floats in the stream.
+    """
+    frame = dataframe.convert_dtypes()
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    column_list = ", ".join(f'"{column}"' for column in frame.columns)
+    statement = f'COPY "{table_name}" ({column_list}) FROM STDIN WITH (FORMAT CSV)'
+    cursor = connection.connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            cursor.copy_expert(statement, buffer)
+        else:  # psycopg 3
+            with cursor.copy(statement) as copy:
+                copy.write(buffer.getvalue())
+    except Exception as exc:
+        raise DBLoadError(f"Database load failed for table {table_name}: {exc}") from exc
+    finally:
+        cursor.close()
+    return int(frame.shape[0])
+
+
 def _execute_postgres_upsert(connection, *, table_name: str, dataframe: pd.DataFrame, chunksize: int) -> int:
-    from sqlalchemy.dialects.postgresql import insert as pg_insert  # type: ignore
+    """COPY into a temporary staging table, then resolve conflicts server-side.
 
+    The staging hop keeps COPY throughput for the bulk transfer while a single
+    set-based ``INSERT ... ON CONFLICT DO NOTHING`` handles duplicates,
+    replacing the former chunked multi-row INSERT statements. ``chunksize`` is
+    kept for interface parity with the other loaders but is unused here.
+    """
     metadata = MetaData()
     table = Table(table_name, metadata, autoload_with=connection)
     primary_keys = [column.name for column in table.primary_key.columns]
     if not primary_keys:
         raise DBLoadError(f"Table {table_name} has no primary key; cannot perform UPSERT.")
 
-    records = dataframe.to_dict(orient="records")
-    if not records:
+    if dataframe.shape[0] == 0:
         return 0
 
-    chunk_size = chunksize or len(records)
-    for start in range(0, len(records), chunk_size):
-        chunk = records[start : start + chunk_size]
-        stmt = pg_insert(table).values(chunk)
-        stmt = stmt.on_conflict_do_nothing(index_elements=primary_keys)
-        connection.execute(stmt)
-
-    return len(records)
+    staging_table = f"_staging_{table_name}"
+    connection.execute(
+        text(
+            f'CREATE TEMPORARY TABLE "{staging_table}" '
+            f'(LIKE "{table_name}" INCLUDING DEFAULTS) ON COMMIT DROP'
+        )
+    )
+    _execute_postgres_copy(connection, table_name=staging_table, dataframe=dataframe)
+    column_list = ", ".join(f'"{column}"' for column in dataframe.columns)
+    conflict_list = ", ".join(f'"{column}"' for column in primary_keys)
+    connection.execute(
+        text(
+            f'INSERT INTO "{table_name}" ({column_list}) '
+            f'SELECT {column_list} FROM "{staging_table}" '
+            f"ON CONFLICT ({conflict_list}) DO NOTHING"
+        )
+    )
+    return int(dataframe.shape[0])
 
 
 def _execute_sqlite_upsert(connection, *, table_name: str, dataframe: pd.DataFrame, chunksize: int) -> int:
@@ -2,8 +2,10 @@ from __future__ import annotations
 
 import argparse
 import json
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import replace
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Iterable, List, Mapping, Sequence
 
@@ -13,7 +15,7 @@ from app.core.config import ETLSettings, get_settings
 from app.core.logging import get_logger
 from app.etl.connectors import LocalFileConnector, S3Connector, StorageError
 from app.etl.manifest import ETLManifest, resolve_etl_settings
-from app.etl.schema_catalog import SchemaCatalog, load_catalog
+from app.etl.schema_catalog import SchemaCatalog
 from app.etl.schema_utils import normalize_date_columns
 
 logger = get_logger(__name__)
@@ -23,10 +25,39 @@ class ETLError(RuntimeError):
     """Raised when the JSON -> CSV -> S3 ETL pipeline fails."""
 
 
+# Bumped by invalidate_schema_catalog so callers that change the schema at
+# runtime can bust the catalog cache without touching the config file.
+_catalog_version = 0
+
+
 def get_schema_catalog(settings: ETLSettings | None = None) -> SchemaCatalog:
-    """Return the schema catalog, optionally using overrides from settings."""
+    """Return the schema catalog, optionally using overrides from settings.
+
+    The catalog is memoized on the config file's mtime, so the request path
+    pays one ``stat`` instead of re-reading the file; editing the config
+    refreshes the cache automatically.
+    """
     path = settings.schema_config_path if settings else get_settings().etl.schema_config_path
-    return load_catalog(path)
+    mtime: float | None = None
+    if path:
+        try:
+            mtime = Path(path).stat().st_mtime
+        except OSError:
+            mtime = None
+    return _load_catalog_cached(path, mtime, _catalog_version)
+
+
+@lru_cache(maxsize=8)
+def _load_catalog_cached(path: str | None, mtime: float | None, version: int) -> SchemaCatalog:
+    if path:
+        return SchemaCatalog.from_file(path)
+    return SchemaCatalog.default()
+
+
+def invalidate_schema_catalog() -> None:
+    """Force the next get_schema_catalog call to re-read the config."""
+    global _catalog_version
+    _catalog_version += 1
 
 
 def _build_resource_map(catalog: SchemaCatalog) -> Dict[str, str]:
@@ -179,16 +210,45 @@ def _apply_column_mapping(
     return working.reindex(columns=target_columns)
 
 
-def load(df: pd.DataFrame, table: str, settings: ETLSettings) -> Dict[str, str | int | None]:
-    """Persist the dataframe to disk and optionally upload it to S3."""
+# Single background worker for audit-CSV writes deferred off the request
+# path; one worker keeps writes ordered per run.
+_csv_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="etl-csv-writer")
+
+
+def _write_csv_snapshot(connector: LocalFileConnector, table: str, df: pd.DataFrame, filename: str) -> None:
+    try:
+        connector.write(table, df, filename)
+    except Exception:  # pragma: no cover - audit copy is best-effort
+        logger.exception("Deferred CSV write failed for table %s", table)
+
+
+def load(
+    df: pd.DataFrame,
+    table: str,
+    settings: ETLSettings,
+    *,
+    defer_local_write: bool = False,
+) -> Dict[str, object]:
+    """Persist the dataframe to disk and optionally upload it to S3.
+
+    With ``defer_local_write`` the CSV is written on a background thread so
+    callers that consume the returned in-memory dataframe (the DB load path)
+    do not pay for disk I/O twice; the audit copy still lands at
+    ``local_path``. Deferral is skipped when an S3 upload needs the file.
+    """
 
     timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
     filename = f"{table}_{timestamp}.csv"
     local_connector = LocalFileConnector(settings.processed_dir)
-    local_path = local_connector.write(table, df, filename)
+    upload_to_s3 = bool(settings.enable_s3 and settings.s3_bucket)
+    if defer_local_write and not upload_to_s3:
+        local_path = Path(settings.processed_dir) / table / filename
+        _csv_writer.submit(_write_csv_snapshot, local_connector, table, df, filename)
+    else:
+        local_path = local_connector.write(table, df, filename)
 
     s3_uri: str | None = None
-    if settings.enable_s3 and settings.s3_bucket:
+    if upload_to_s3:
         try:
             s3 = S3Connector(
                 settings.s3_bucket,
@@ -207,6 +267,7 @@ def load(df: pd.DataFrame, table: str, settings: ETLSettings) -> Dict[str, str |
         "row_count": int(df.shape[0]),
         "local_path": str(local_path),
         "s3_uri": s3_uri,
+        "dataframe": df,
     }
 
 
@@ -216,7 +277,7 @@ def run_pipeline(
     *,
     manifest: ETLManifest | None = None,
     column_mappings: Mapping[str, Mapping[str, str]] | None = None,
-) -> Dict[str, str | int | None]:
+) -> Dict[str, object]:
     """High-level helper to execute the raw JSON ? CSV ? S3 pipeline."""
 
     file_paths = extract(settings)
@@ -236,7 +297,8 @@ def run_pipeline_all(
     *,
     manifest: ETLManifest | None = None,
     column_mappings: Mapping[str, Mapping[str, str]] | None = None,
-) -> Dict[str, Dict[str, str | int | None]]:
+    defer_local_write: bool = False,
+) -> Dict[str, Dict[str, object]]:
     """Execute the pipeline for every supported table in one pass."""
 
     file_paths = extract(settings)
@@ -249,9 +311,11 @@ def run_pipeline_all(
         column_mappings=column_mappings,
     )
 
-    results: Dict[str, Dict[str, str | int | None]] = {}
+    results: Dict[str, Dict[str, object]] = {}
     for table, dataframe in datasets.items():
-        results[table] = load(dataframe, table=table, settings=settings)
+        results[table] = load(
+            dataframe, table=table, settings=settings, defer_local_write=defer_local_write
+        )
     return results
 
 
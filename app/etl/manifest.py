@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import json
 from dataclasses import dataclass, replace
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Tuple
 
@@ -180,7 +181,12 @@ def load_manifest(path: Path) -> ETLManifest:
 
 
 def resolve_etl_settings(base: ETLSettings) -> Tuple[ETLSettings, ETLManifest | None]:
-    """Return ETL settings optionally overridden by a manifest."""
+    """Return ETL settings optionally overridden by a manifest.
+
+    Resolution is memoized on the manifest's mtime, so repeated calls on the
+    request path cost one ``stat`` instead of re-reading and re-parsing the
+    manifest; editing the file refreshes the result automatically.
+    """
 
     manifest_path = base.manifest_path
     candidate: Path | None = None
@@ -192,9 +198,20 @@ def resolve_etl_settings(base: ETLSettings) -> Tuple[ETLSettings, ETLManifest |
     elif DEFAULT_MANIFEST_PATH.exists():
         candidate = DEFAULT_MANIFEST_PATH
 
-    if candidate is None or not candidate.exists():
+    if candidate is None:
+        return base, None
+    try:
+        mtime = candidate.stat().st_mtime
+    except OSError:
         return base, None
 
+    return _resolve_etl_settings_cached(base, candidate, mtime)
+
+
+@lru_cache(maxsize=8)
+def _resolve_etl_settings_cached(
+    base: ETLSettings, candidate: Path, mtime: float
+) -> Tuple[ETLSettings, ETLManifest | None]:
     try:
         manifest = load_manifest(candidate)
     except Exception as exc:  # pragma: no cover - surface manifest issues
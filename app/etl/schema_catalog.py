@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import json
 from dataclasses import dataclass
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Dict, Iterable, List, Mapping
 
@@ -46,8 +46,10 @@ class SchemaCatalog:
         if not self.tables:
             raise ValueError("Schema catalog must include at least one table.")
 
-    @property
+    @cached_property
     def table_names(self) -> List[str]:
+        # Catalogs are immutable once built, so the sorted listing is
+        # computed at most once per instance rather than per access.
         return sorted(self.tables)
 
     def get_columns(self, table: str) -> List[str]:
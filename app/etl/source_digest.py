@@ -0,0 +1,98 @@
+"""Content digests for ETL source files, memoized across runs."""
+
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+
+from app.core.json_store import DebouncedJsonWriter
+from app.core.logging import get_logger
+
+try:
+    from xxhash import xxh3_64 as _new_hasher
+except ImportError:  # pragma: no cover - xxhash ships in requirements
+    import hashlib
+
+    def _new_hasher():
+        return hashlib.blake2b(digest_size=8)
+
+logger = get_logger(__name__)
+
+DIGEST_CACHE_PATH = Path(".cache/etl_source_digests.json")
+
+_READ_CHUNK_BYTES = 1 << 20
+
+
+class SourceDigestCache:
+    """Two-tier (stat -> content hash) cache for ETL source files.
+
+    Cache keys built from raw mtimes go stale the moment a file is touched,
+    so workers holding byte-identical sources with fresh timestamps (a CI
+    checkout, an rsync) always missed. Hashing content keeps the keys
+    stable, and the stat tier — ``(mtime_ns, size)`` — means a file is only
+    re-read after it actually changes on disk.
+    """
+
+    def __init__(self, path: Path | None = None) -> None:
+        self._path = path or DIGEST_CACHE_PATH
+        # path -> [mtime_ns, size, digest]
+        self._entries: dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._writer = DebouncedJsonWriter(self._path)
+        self._load()
+
+    def _load(self) -> None:
+        if not self._path.exists():
+            return
+        try:
+            payload = json.loads(self._path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError as exc:  # pragma: no cover - corrupted cache
+            logger.warning("Source digest cache is invalid JSON: %s", exc)
+            return
+        files = payload.get("files") if isinstance(payload, dict) else None
+        if isinstance(files, dict):
+            for key, entry in files.items():
+                if isinstance(entry, list) and len(entry) == 3 and isinstance(entry[2], str):
+                    try:
+                        self._entries[str(key)] = [int(entry[0]), int(entry[1]), entry[2]]
+                    except (TypeError, ValueError):  # pragma: no cover - malformed entry
+                        continue
+
+    def digest(self, path: str, *, mtime_ns: int, size: int) -> str:
+        """Return the content digest for ``path``, re-hashing only on change."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == mtime_ns and entry[1] == size:
+                return entry[2]
+        value = self._hash_file(path)
+        with self._lock:
+            self._entries[path] = [mtime_ns, size, value]
+            snapshot = {"files": {key: list(entry) for key, entry in self._entries.items()}}
+        self._writer.submit(snapshot)
+        return value
+
+    @staticmethod
+    def _hash_file(path: str) -> str:
+        hasher = _new_hasher()
+        try:
+            with open(path, "rb") as handle:
+                while chunk := handle.read(_READ_CHUNK_BYTES):
+                    hasher.update(chunk)
+        except OSError as exc:  # pragma: no cover - racing deletes/permission flips
+            logger.warning("Hashing source file %s failed: %s", path, exc)
+            return "unreadable"
+        return hasher.hexdigest()
+
+
+_cache: SourceDigestCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_source_digest_cache() -> SourceDigestCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SourceDigestCache()
+    return _cache
@@ -47,8 +47,8 @@ def _memory_conversation_store(monkeypatch: pytest.MonkeyPatch) -> None:
     def get_history(session_id: str) -> List[dict]:
         return list(history.get(session_id, []))
 
-    def get_last_intent(session_id: str) -> str | None:
-        return intents.get(session_id)
+    def get_history_and_intent(session_id: str) -> tuple[List[dict], str | None]:
+        return list(history.get(session_id, [])), intents.get(session_id)
 
     def set_last_intent(session_id: str, intent: str) -> None:
         intents[session_id] = intent
@@ -56,7 +56,7 @@ def _memory_conversation_store(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr(service_module, "append_user_turn", append_user)
     monkeypatch.setattr(service_module, "append_agent_turn", append_agent)
     monkeypatch.setattr(service_module, "conversation_history", get_history)
-    monkeypatch.setattr(service_module, "get_last_intent", get_last_intent)
+    monkeypatch.setattr(service_module, "get_history_and_intent", get_history_and_intent)
     monkeypatch.setattr(service_module, "set_last_intent", set_last_intent)
 
 
@@ -94,7 +94,7 @@ def smoke_client(monkeypatch: pytest.MonkeyPatch, tmp_path) -> TestClient:
     monkeypatch.setattr(service_module, "get_settings", lambda: stub_settings)
     monkeypatch.setattr(service_module, "get_client", lambda: None)
     monkeypatch.setattr(service_module, "LambdaLLMClient", lambda: stub_llm)
-    monkeypatch.setattr(service_module, "ChromaRetriever", lambda: StubRetriever())
+    monkeypatch.setattr(service_module, "get_retriever", lambda: StubRetriever())
     monkeypatch.setattr(service_module, "IntentClassifier", lambda: StubIntentClassifier())
 
     def fake_execute_query(sql: str, params=None):
@@ -107,7 +107,7 @@ def smoke_client(monkeypatch: pytest.MonkeyPatch, tmp_path) -> TestClient:
 
     monkeypatch.setattr(service_module, "execute_query", fake_execute_query)
 
-    def fake_run_pipeline_all(etl_settings, *, manifest=None, column_mappings=None):
+    def fake_run_pipeline_all(etl_settings, *, manifest=None, column_mappings=None, defer_local_write=False):
         return {
             "patients": {
                 "table": "patients",
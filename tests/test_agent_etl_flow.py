@@ -39,7 +39,7 @@ def test_agent_service_handles_etl_intent(monkeypatch, tmp_path):
     (tmp_path / "raw").mkdir(parents=True, exist_ok=True)
     (tmp_path / "processed").mkdir(parents=True, exist_ok=True)
 
-    def fake_run_pipeline_all(etl_settings: ETLSettings, *, manifest=None, column_mappings=None):
+    def fake_run_pipeline_all(etl_settings: ETLSettings, *, manifest=None, column_mappings=None, defer_local_write=False):
         assert etl_settings is settings.etl
         results: dict[str, dict[str, str | int | None]] = {}
         for table in ("patients", "encounters"):
@@ -55,7 +55,7 @@ def test_agent_service_handles_etl_intent(monkeypatch, tmp_path):
             }
         return results
 
-    monkeypatch.setattr(service_module, "ChromaRetriever", lambda: StubRetriever())
+    monkeypatch.setattr(service_module, "get_retriever", lambda: StubRetriever())
     monkeypatch.setattr(service_module, "LambdaLLMClient", lambda: StubLLM())
     monkeypatch.setattr(service_module, "run_pipeline_all", fake_run_pipeline_all)
     monkeypatch.setattr(service_module, "get_settings", lambda: settings)
@@ -106,6 +106,9 @@ def test_agent_service_retries_with_upsert_on_duplicate(monkeypatch, tmp_path):
         def get_strategy(self, table: str) -> str | None:
             return self.strategies.get(table)
 
+        def get_strategies(self, tables) -> dict[str, str]:
+            return {table: self.strategies[table] for table in tables if table in self.strategies}
+
         def record_strategy(self, table: str, strategy: str, error: str | None = None) -> None:
             self.strategies[table] = strategy
 
@@ -136,7 +139,7 @@ def test_agent_service_retries_with_upsert_on_duplicate(monkeypatch, tmp_path):
     processed_path = tmp_path / "processed" / "patients" / "patients_20240101000000.csv"
     processed_path.write_text("id\nstub\n", encoding="utf-8")
 
-    def fake_run_pipeline_all(etl_settings: ETLSettings, *, manifest=None, column_mappings=None):
+    def fake_run_pipeline_all(etl_settings: ETLSettings, *, manifest=None, column_mappings=None, defer_local_write=False):
         return {
             "patients": {
                 "table": "patients",
@@ -154,7 +157,7 @@ def test_agent_service_retries_with_upsert_on_duplicate(monkeypatch, tmp_path):
             raise DBLoadError("duplicate key value violates unique constraint")
         return LoadResult(table=request.table, inserted_rows=1, source_path=Path(request.csv_path))
 
-    monkeypatch.setattr(service_module, "ChromaRetriever", lambda: StubRetriever())
+    monkeypatch.setattr(service_module, "get_retriever", lambda: StubRetriever())
     monkeypatch.setattr(service_module, "LambdaLLMClient", lambda: StubLLM())
     monkeypatch.setattr(service_module, "RepairKnowledge", lambda: StubRepairKnowledge())
     monkeypatch.setattr(service_module, "run_pipeline_all", fake_run_pipeline_all)
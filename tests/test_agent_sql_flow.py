@@ -27,11 +27,15 @@ def _install_memory_conversation_store(monkeypatch: pytest.MonkeyPatch) -> None:
     store: dict[str, list[dict]] = {}
     intents: dict[str, str] = {}
 
-    def append_user(session_id: str, prompt: str) -> None:
-        store.setdefault(session_id, []).append({"role": "user", "prompt": prompt})
+    def append_user(session_id: str, prompt: str) -> dict:
+        turn = {"role": "user", "prompt": prompt}
+        store.setdefault(session_id, []).append(turn)
+        return turn
 
-    def append_agent(session_id: str, turn: dict) -> None:
-        store.setdefault(session_id, []).append({**turn, "role": "agent"})
+    def append_agent(session_id: str, turn: dict) -> dict:
+        payload = {**turn, "role": "agent"}
+        store.setdefault(session_id, []).append(payload)
+        return payload
 
     def history(session_id: str) -> list[dict]:
         return list(store.get(session_id, []))
@@ -39,14 +43,14 @@ def _install_memory_conversation_store(monkeypatch: pytest.MonkeyPatch) -> None:
     def set_intent(session_id: str, intent: str) -> None:
         intents[session_id] = intent
 
-    def get_intent(session_id: str) -> str | None:
-        return intents.get(session_id)
+    def history_and_intent(session_id: str) -> tuple[list[dict], str | None]:
+        return list(store.get(session_id, [])), intents.get(session_id)
 
     monkeypatch.setattr(service_module, "append_user_turn", append_user)
     monkeypatch.setattr(service_module, "append_agent_turn", append_agent)
     monkeypatch.setattr(service_module, "conversation_history", history)
     monkeypatch.setattr(service_module, "set_last_intent", set_intent)
-    monkeypatch.setattr(service_module, "get_last_intent", get_intent)
+    monkeypatch.setattr(service_module, "get_history_and_intent", history_and_intent)
 
 
 def _build_settings(tmp_path) -> SimpleNamespace:
@@ -70,7 +74,7 @@ def _build_settings(tmp_path) -> SimpleNamespace:
 
 def _install_common_patches(monkeypatch: pytest.MonkeyPatch, tmp_path, llm_instance) -> None:
     settings = _build_settings(tmp_path)
-    monkeypatch.setattr(service_module, "ChromaRetriever", lambda: StubRetriever())
+    monkeypatch.setattr(service_module, "get_retriever", lambda: StubRetriever())
     monkeypatch.setattr(service_module, "LambdaLLMClient", lambda: llm_instance)
     monkeypatch.setattr(service_module, "IntentClassifier", lambda: StubIntentClassifier())
     monkeypatch.setattr(service_module, "get_settings", lambda: settings)
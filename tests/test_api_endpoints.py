@@ -59,7 +59,7 @@ def client(monkeypatch: pytest.MonkeyPatch) -> TestClient:
         def set_handler(self, handler):
             self._handler = handler
 
-        def handle_query(self, prompt: str, *, session_id: str | None = None):
+        async def ahandle_query(self, prompt: str, *, session_id: str | None = None):
             if self._handler is None:
                 raise RuntimeError("Handler not configured")
             response, sid, history = self._handler(prompt, session_id=session_id)
@@ -70,7 +70,7 @@ def client(monkeypatch: pytest.MonkeyPatch) -> TestClient:
     def configure(handler):
         stub.set_handler(handler)
 
-    monkeypatch.setattr(service_instance, "handle_query", stub.handle_query)
+    monkeypatch.setattr(service_instance, "ahandle_query", stub.ahandle_query)
     monkeypatch.setattr(service_instance, "configure_for_test", configure, raising=False)
     return TestClient(app)
 
@@ -82,10 +82,10 @@ def _success_history() -> list[Dict[str, Any]]:
 def test_query_sql_success(monkeypatch: pytest.MonkeyPatch):
     client = TestClient(app)
 
-    def fake_handle(prompt: str, *, session_id: str | None = None):
+    async def fake_handle(prompt: str, *, session_id: str | None = None):
         return DummySQLResponse(), session_id or "session-123", _success_history()
 
-    monkeypatch.setattr(service_instance, "handle_query", fake_handle)
+    monkeypatch.setattr(service_instance, "ahandle_query", fake_handle)
 
     response = client.post("/query", json={"prompt": "select something"})
 
@@ -99,10 +99,10 @@ def test_query_sql_success(monkeypatch: pytest.MonkeyPatch):
 def test_query_guardrail_violation(monkeypatch: pytest.MonkeyPatch):
     client = TestClient(app)
 
-    def fake_handle(prompt: str, *, session_id: str | None = None):
+    async def fake_handle(prompt: str, *, session_id: str | None = None):
         raise GuardrailViolation("blocked")
 
-    monkeypatch.setattr(service_instance, "handle_query", fake_handle)
+    monkeypatch.setattr(service_instance, "ahandle_query", fake_handle)
 
     response = client.post("/query", json={"prompt": "DROP TABLE patients"})
 
@@ -113,10 +113,10 @@ def test_query_guardrail_violation(monkeypatch: pytest.MonkeyPatch):
 def test_query_retriever_failure(monkeypatch: pytest.MonkeyPatch):
     client = TestClient(app)
 
-    def fake_handle(prompt: str, *, session_id: str | None = None):
+    async def fake_handle(prompt: str, *, session_id: str | None = None):
         raise RetrievalError("vector store down")
 
-    monkeypatch.setattr(service_instance, "handle_query", fake_handle)
+    monkeypatch.setattr(service_instance, "ahandle_query", fake_handle)
 
     response = client.post("/query", json={"prompt": "what's wrong?"})
 
@@ -127,10 +127,10 @@ def test_query_retriever_failure(monkeypatch: pytest.MonkeyPatch):
 def test_query_agent_execution_failure(monkeypatch: pytest.MonkeyPatch):
     client = TestClient(app)
 
-    def fake_handle(prompt: str, *, session_id: str | None = None):
+    async def fake_handle(prompt: str, *, session_id: str | None = None):
         raise AgentExecutionError("failed", attempts=3, errors=["boom"])
 
-    monkeypatch.setattr(service_instance, "handle_query", fake_handle)
+    monkeypatch.setattr(service_instance, "ahandle_query", fake_handle)
 
     response = client.post("/query", json={"prompt": "run complex thing"})
 
@@ -143,10 +143,10 @@ def test_query_agent_execution_failure(monkeypatch: pytest.MonkeyPatch):
 def test_query_etl_success(monkeypatch: pytest.MonkeyPatch):
     client = TestClient(app)
 
-    def fake_handle(prompt: str, *, session_id: str | None = None):
+    async def fake_handle(prompt: str, *, session_id: str | None = None):
         return DummyETLResponse(), session_id or "session-etl", _success_history()
 
-    monkeypatch.setattr(service_instance, "handle_query", fake_handle)
+    monkeypatch.setattr(service_instance, "ahandle_query", fake_handle)
 
     response = client.post("/query", json={"prompt": "run full etl"})
 
@@ -37,6 +37,27 @@ def test_load_table_from_csv_inserts_rows(tmp_path, monkeypatch):
     assert rows == 2
 
 
+def test_load_table_from_csv_prefers_in_memory_dataframe(tmp_path, monkeypatch):
+    df = pd.DataFrame([{"id": "1", "name": "Alice"}])
+
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE patients (id TEXT, name TEXT)"))
+
+    monkeypatch.setattr("app.etl.db_loader.get_engine", lambda: engine)
+
+    # The CSV never exists on disk; the provided dataframe is loaded directly.
+    result = load_table_from_csv(
+        LoadRequest(table="patients", csv_path=tmp_path / "missing.csv", dataframe=df),
+        database=DatabaseSettings(url="sqlite://"),
+    )
+
+    assert result.inserted_rows == 1
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT COUNT(*) FROM patients")).scalar()
+    assert rows == 1
+
+
 def test_load_table_from_csv_missing_file(tmp_path, monkeypatch):
     engine = create_engine("sqlite://")
     monkeypatch.setattr("app.etl.db_loader.get_engine", lambda: engine)
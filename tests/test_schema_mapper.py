@@ -48,6 +48,31 @@ def test_schema_mapper_generates_and_caches(tmp_path):
     assert len(prompts) == 1
 
 
+def test_schema_mapper_batches_multiple_tables(tmp_path):
+    prompts: list[str] = []
+
+    def fake_generate(prompt: str) -> str:
+        prompts.append(prompt)
+        return json.dumps(
+            {
+                "patients": {"id": "PatientID", "first": "FirstName", "last": "LastName"},
+                "encounters": {"id": "EncounterID", "date": "VisitDate"},
+            }
+        )
+
+    encounters = TableDefinition(name="encounters", columns=["id", "date"], resource_types=[])
+    catalog = _make_catalog()
+    catalog.tables["encounters"] = encounters
+
+    mapper = SchemaMapper(generate_fn=fake_generate, cache=SchemaMappingCache(tmp_path / "cache.json"))
+    mappings = mapper.generate_mappings(["patients", "encounters"], catalog=catalog, namespace="demo")
+
+    assert mappings["patients"]["id"] == "PatientID"
+    assert mappings["encounters"]["date"] == "VisitDate"
+    # Both tables resolved from a single batched LLM call
+    assert len(prompts) == 1
+
+
 def test_schema_mapper_raises_on_invalid_json(tmp_path):
     def bad_generate(prompt: str) -> str:
         return "not-json"
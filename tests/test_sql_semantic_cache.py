@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.agent.sql_semantic_cache import SQLSemanticCache
+
+
+def _unit(vector: list[float]) -> np.ndarray:
+    row = np.asarray(vector, dtype=np.float32)
+    return row / np.linalg.norm(row)
+
+
+def test_returns_sql_for_similar_embedding():
+    cache = SQLSemanticCache(threshold=0.9)
+    cache.put(_unit([1.0, 0.0, 0.0]), "SELECT 1", schema_hash="v1")
+
+    similar = _unit([1.0, 0.05, 0.0])
+    assert cache.get(similar, schema_hash="v1") == "SELECT 1"
+
+
+def test_misses_below_similarity_threshold():
+    cache = SQLSemanticCache(threshold=0.9)
+    cache.put(_unit([1.0, 0.0, 0.0]), "SELECT 1", schema_hash="v1")
+
+    orthogonal = _unit([0.0, 1.0, 0.0])
+    assert cache.get(orthogonal, schema_hash="v1") is None
+
+
+def test_schema_hash_change_invalidates_entry():
+    cache = SQLSemanticCache(threshold=0.9)
+    embedding = _unit([1.0, 0.0, 0.0])
+    cache.put(embedding, "SELECT 1", schema_hash="v1")
+
+    assert cache.get(embedding, schema_hash="v2") is None
+
+
+def test_expired_entry_is_a_miss():
+    cache = SQLSemanticCache(threshold=0.9, ttl_seconds=0.0)
+    embedding = _unit([1.0, 0.0, 0.0])
+    cache.put(embedding, "SELECT 1", schema_hash="v1")
+
+    assert cache.get(embedding, schema_hash="v1") is None